@@ -13,6 +13,12 @@ import time
 from typing import Optional
 import argparse
 
+# Optional: uvloop gives a faster event loop for the websocket client
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -129,17 +135,21 @@ class AIVoiceStreamingHost:
             logger.info(f"👤 Personality: {self.personality_manager.current_personality.name if self.personality_manager.current_personality else 'Default'}")
             logger.info(f"🎵 Voice Profile: pitch={voice_profile.pitch:.1f}, speed={voice_profile.speed:.1f}")
             
-            # Synthesize audio using streaming mode
-            audio_generator = self.voice_manager.synthesize(
+            # Synthesize audio using streaming mode; synthesis and the blocking
+            # queue puts run off the event loop
+            loop = asyncio.get_running_loop()
+            streamed = False
+            async for audio_chunk in self.voice_manager.synthesize_streaming_async(
                 text=enhanced_text,
                 voice_profile_name=voice_profile.name,
-                language=language,
-                mode="streaming"
-            )
+                language=language
+            ):
+                streamed = True
+                if not self.audio_streamer.is_streaming:
+                    break
+                await loop.run_in_executor(None, self.audio_streamer.queue_audio, audio_chunk, True)
             
-            if audio_generator:
-                # Stream the audio
-                self.audio_streamer.stream_audio_generator(audio_generator)
+            if streamed:
                 self.total_messages += 1
                 logger.info("✅ Audio synthesis and streaming completed")
                 return True
@@ -356,6 +366,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Install the policy here, not on import, so embedding code keeps its own loop
+    if uvloop is not None and sys.platform != "win32":
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     try:
         exit_code = asyncio.run(main())
         sys.exit(exit_code)
@@ -62,6 +62,8 @@ class Settings(BaseSettings):
     
     # Performance settings
     use_gpu: bool = True
+    enable_compile: bool = False  # torch.compile for TTS models on GPU (experimental)
+    model_precision: str = "float32"  # float32, bfloat16, float16 (GPU) or int8 (CPU; GPU with bitsandbytes for XTTS)
     max_concurrent_requests: int = 5
     model_cache_size: int = 3
     
@@ -3,7 +3,8 @@ Emotion Detector - Detects emotions from text for voice modulation
 """
 import re
 import logging
-from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional, Union
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -25,10 +26,54 @@ class EmotionType(str, Enum):
 class EmotionDetector:
     """Detects emotions from text content"""
     
+    # Emotion-based voice adjustments
+    _VOICE_ADJUSTMENTS: Dict[EmotionType, Dict[str, float]] = {
+        EmotionType.HAPPY: {"pitch": 1.2, "speed": 1.1, "volume": 1.1},
+        EmotionType.SAD: {"pitch": 0.8, "speed": 0.8, "volume": 0.9},
+        EmotionType.EXCITED: {"pitch": 1.3, "speed": 1.3, "volume": 1.2},
+        EmotionType.ANGRY: {"pitch": 1.1, "speed": 1.2, "volume": 1.3},
+        EmotionType.SURPRISED: {"pitch": 1.4, "speed": 1.2, "volume": 1.1},
+        EmotionType.CALM: {"pitch": 0.9, "speed": 0.8, "volume": 0.9},
+        EmotionType.LOVE: {"pitch": 1.1, "speed": 0.9, "volume": 1.0},
+        EmotionType.SLEEPY: {"pitch": 0.7, "speed": 0.6, "volume": 0.8},
+        EmotionType.PLAYFUL: {"pitch": 1.2, "speed": 1.1, "volume": 1.0}
+    }
+    _DEFAULT_VOICE_ADJUSTMENT: Dict[str, float] = {"pitch": 1.0, "speed": 1.0, "volume": 1.0}
+    
+    # TTS markers wrapped around text for each emotion
+    _EMOTION_MARKERS: Dict[EmotionType, str] = {
+        EmotionType.HAPPY: " *cheerful* ",
+        EmotionType.SAD: " *sad* ",
+        EmotionType.EXCITED: " *excited* ",
+        EmotionType.ANGRY: " *angry* ",
+        EmotionType.SURPRISED: " *surprised* ",
+        EmotionType.CALM: " *calm* ",
+        EmotionType.LOVE: " *loving* ",
+        EmotionType.SLEEPY: " *sleepy* ",
+        EmotionType.PLAYFUL: " *playful* "
+    }
+    
     def __init__(self):
         self.emotion_keywords = self._load_emotion_keywords()
         self.emotion_patterns = self._load_emotion_patterns()
         self.punctuation_emotions = self._load_punctuation_emotions()
+        
+        # Flattened detection tables so detect_emotions walks each once
+        self._keyword_rules = tuple(
+            (emotion, tuple(keyword.lower() for keyword in keywords), len(keywords))
+            for emotion, keywords in self.emotion_keywords.items()
+            if keywords
+        )
+        self._pattern_rules = tuple(
+            (emotion, re.compile(pattern))
+            for emotion, patterns in self.emotion_patterns.items()
+            for pattern in patterns
+        )
+        self._punctuation_rules = tuple(self.punctuation_emotions.items())
+        
+        # Memoized so the primary/intensity/context/adjustment helpers share
+        # one detection pass per text
+        self._emotion_analysis = lru_cache(maxsize=2048)(self._analyze_emotions)
     
     def _load_emotion_keywords(self) -> Dict[EmotionType, List[str]]:
         """Load emotion keywords for different languages"""
@@ -148,56 +193,67 @@ class EmotionDetector:
             "🔥": EmotionType.EXCITED,
         }
     
-    def detect_emotions(self, text: str) -> List[Tuple[EmotionType, float]]:
+    def detect_emotions(
+        self, text: Union[str, List[str]]
+    ) -> Union[List[Tuple[EmotionType, float]], List[List[Tuple[EmotionType, float]]]]:
         """
-        Detect emotions in text
+        Detect emotions in text, or in each of a list of texts
         
         Returns:
-            List of (emotion, confidence) tuples
+            List of (emotion, confidence) tuples, or one such list per text
         """
-        emotions = {}
-        text_lower = text.lower()
+        if isinstance(text, str):
+            return list(self._emotion_analysis(text))
+        
+        analyze = self._emotion_analysis
+        return [list(analyze(item)) for item in text]
+    
+    def _analyze_emotions(self, text: str) -> Tuple[Tuple[EmotionType, float], ...]:
+        """Run the keyword, pattern and punctuation rules over text"""
+        emotions: Dict[EmotionType, float] = {}
+        # Keywords are lowercased at build time; skip the copy if text already is
+        text_lower = text if text.islower() else text.lower()
         
         # Keyword-based detection
-        for emotion, keywords in self.emotion_keywords.items():
+        for emotion, keywords, keyword_count in self._keyword_rules:
             score = 0
             for keyword in keywords:
-                if keyword.lower() in text_lower:
+                if keyword in text_lower:
                     score += 1
             
             if score > 0:
                 # Normalize score
-                confidence = min(score / len(keywords) * 10, 1.0)
-                emotions[emotion] = max(emotions.get(emotion, 0), confidence)
+                confidence = min(score / keyword_count * 10, 1.0)
+                if confidence > emotions.get(emotion, 0):
+                    emotions[emotion] = confidence
         
         # Pattern-based detection
-        for emotion, patterns in self.emotion_patterns.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text)
-                if matches:
-                    confidence = min(len(matches) * 0.3, 1.0)
-                    emotions[emotion] = max(emotions.get(emotion, 0), confidence)
+        for emotion, pattern in self._pattern_rules:
+            matches = pattern.findall(text)
+            if matches:
+                confidence = min(len(matches) * 0.3, 1.0)
+                if confidence > emotions.get(emotion, 0):
+                    emotions[emotion] = confidence
         
         # Punctuation-based detection
-        for punct, emotion in self.punctuation_emotions.items():
-            if punct in text:
-                confidence = 0.5
-                emotions[emotion] = max(emotions.get(emotion, 0), confidence)
+        for punct, emotion in self._punctuation_rules:
+            if punct in text and 0.5 > emotions.get(emotion, 0):
+                emotions[emotion] = 0.5
         
         # Sort by confidence
         result = [(emotion, confidence) for emotion, confidence in emotions.items()]
         result.sort(key=lambda x: x[1], reverse=True)
         
-        return result
+        return tuple(result)
     
     def get_primary_emotion(self, text: str) -> Optional[EmotionType]:
         """Get the primary emotion from text"""
-        emotions = self.detect_emotions(text)
+        emotions = self._emotion_analysis(text)
         return emotions[0][0] if emotions else None
     
     def get_emotion_intensity(self, text: str, emotion: EmotionType) -> float:
         """Get intensity of specific emotion in text"""
-        emotions = self.detect_emotions(text)
+        emotions = self._emotion_analysis(text)
         for detected_emotion, confidence in emotions:
             if detected_emotion == emotion:
                 return confidence
@@ -230,37 +286,11 @@ class EmotionDetector:
         """Suggest voice parameter adjustments based on emotions"""
         primary_emotion = self.get_primary_emotion(text)
         
-        if not primary_emotion:
-            return {"pitch": 1.0, "speed": 1.0, "volume": 1.0}
-        
-        # Emotion-based voice adjustments
-        adjustments = {
-            EmotionType.HAPPY: {"pitch": 1.2, "speed": 1.1, "volume": 1.1},
-            EmotionType.SAD: {"pitch": 0.8, "speed": 0.8, "volume": 0.9},
-            EmotionType.EXCITED: {"pitch": 1.3, "speed": 1.3, "volume": 1.2},
-            EmotionType.ANGRY: {"pitch": 1.1, "speed": 1.2, "volume": 1.3},
-            EmotionType.SURPRISED: {"pitch": 1.4, "speed": 1.2, "volume": 1.1},
-            EmotionType.CALM: {"pitch": 0.9, "speed": 0.8, "volume": 0.9},
-            EmotionType.LOVE: {"pitch": 1.1, "speed": 0.9, "volume": 1.0},
-            EmotionType.SLEEPY: {"pitch": 0.7, "speed": 0.6, "volume": 0.8},
-            EmotionType.PLAYFUL: {"pitch": 1.2, "speed": 1.1, "volume": 1.0}
-        }
-        
-        return adjustments.get(primary_emotion, {"pitch": 1.0, "speed": 1.0, "volume": 1.0})
+        # Return a copy so callers may tweak the values without touching the table
+        adjustments = self._VOICE_ADJUSTMENTS.get(primary_emotion, self._DEFAULT_VOICE_ADJUSTMENT)
+        return dict(adjustments)
     
     def add_emotional_markers(self, text: str, emotion: EmotionType) -> str:
         """Add emotional markers to text for TTS"""
-        markers = {
-            EmotionType.HAPPY: " *cheerful* ",
-            EmotionType.SAD: " *sad* ",
-            EmotionType.EXCITED: " *excited* ",
-            EmotionType.ANGRY: " *angry* ",
-            EmotionType.SURPRISED: " *surprised* ",
-            EmotionType.CALM: " *calm* ",
-            EmotionType.LOVE: " *loving* ",
-            EmotionType.SLEEPY: " *sleepy* ",
-            EmotionType.PLAYFUL: " *playful* "
-        }
-        
-        marker = markers.get(emotion, "")
+        marker = self._EMOTION_MARKERS.get(emotion, "")
         return f"{marker}{text}{marker}"
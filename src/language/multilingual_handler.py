@@ -3,7 +3,9 @@ Multilingual Handler - Manages multilingual text processing and language detecti
 """
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
 
 try:
@@ -25,6 +27,20 @@ class Language(str, Enum):
     UNKNOWN = "unknown"
 
 
+# Code point ranges (inclusive) mirroring the language_patterns character classes,
+# sorted by start so single characters can be classified with bisect
+_CHAR_RANGES = (
+    (0x0041, 0x005A, Language.ENGLISH),   # A-Z
+    (0x0061, 0x007A, Language.ENGLISH),   # a-z
+    (0x3040, 0x309F, Language.JAPANESE),  # Hiragana
+    (0x30A0, 0x30FF, Language.JAPANESE),  # Katakana
+    (0x3400, 0x4DBF, Language.CHINESE),   # CJK Extension A
+    (0x4E00, 0x9FFF, Language.CHINESE),   # CJK Unified Ideographs
+    (0xAC00, 0xD7AF, Language.KOREAN),    # Hangul Syllables
+    (0xF900, 0xFAFF, Language.CHINESE),   # CJK Compatibility Ideographs
+)
+
+
 class MultilingualHandler:
     """Handles multilingual text processing and language detection"""
     
@@ -41,6 +57,23 @@ class MultilingualHandler:
         
         # Language-specific processing rules
         self.processing_rules = self._load_processing_rules()
+        
+        # Per-language normalizers, dispatched by lookup instead of if/elif
+        self._normalizers: Dict[Language, Callable[[str], str]] = {
+            Language.CHINESE: self._normalize_chinese,
+            Language.ENGLISH: self._normalize_english,
+            Language.JAPANESE: self._normalize_japanese,
+            Language.KOREAN: self._normalize_korean,
+        }
+        
+        # Sorted range table for per-character language lookup
+        self._range_starts = [start for start, _, _ in _CHAR_RANGES]
+        self._range_ends = [end for _, end, _ in _CHAR_RANGES]
+        self._range_languages = [language for _, _, language in _CHAR_RANGES]
+        
+        # Memoized breakdown so detect_language/detect_all_languages/
+        # analyze_text_complexity don't rescan the same text
+        self._language_breakdown = lru_cache(maxsize=2048)(self._analyze_languages)
     
     def _load_language_patterns(self) -> Dict[Language, str]:
         """Load regex patterns for language detection"""
@@ -84,6 +117,43 @@ class MultilingualHandler:
             }
         }
     
+    def _analyze_languages(self, text: str) -> Tuple[str, Tuple[Tuple[Language, float], ...]]:
+        """
+        Character-class language breakdown shared by the detection methods
+        
+        Returns:
+            Tuple of (clean_text, ((language, share), ...)) sorted by share,
+            with an empty breakdown when no language characters are found
+        """
+        # Remove non-text characters for analysis
+        clean_text = re.sub(r'[^\w\s\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]', '', text)
+        
+        if not clean_text.strip():
+            return clean_text, ()
+        
+        # Count characters for each language
+        language_counts = {}
+        total_chars = 0
+        
+        for language, pattern in self.language_patterns.items():
+            matches = re.findall(pattern, clean_text)
+            count = len(matches)
+            if count > 0:
+                language_counts[language] = count
+                total_chars += count
+        
+        if total_chars == 0:
+            return clean_text, ()
+        
+        # Calculate percentages and sort
+        results = [
+            (lang, count / total_chars)
+            for lang, count in language_counts.items()
+        ]
+        results.sort(key=lambda x: x[1], reverse=True)
+        
+        return clean_text, tuple(results)
+    
     def detect_language(self, text: str) -> Tuple[Language, float]:
         """
         Detect the primary language of text
@@ -92,42 +162,17 @@ class MultilingualHandler:
             Tuple of (language, confidence)
         """
         try:
-            # Remove non-text characters for analysis
-            clean_text = re.sub(r'[^\w\s\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]', '', text)
+            clean_text, languages = self._language_breakdown(text)
             
-            if not clean_text.strip():
+            if not languages:
                 return Language.UNKNOWN, 0.0
             
-            # Count characters for each language
-            language_counts = {}
-            total_chars = 0
-            
-            for language, pattern in self.language_patterns.items():
-                matches = re.findall(pattern, clean_text)
-                count = len(matches)
-                if count > 0:
-                    language_counts[language] = count
-                    total_chars += count
-            
-            if total_chars == 0:
-                return Language.UNKNOWN, 0.0
-            
-            # Calculate percentages
-            language_percentages = {
-                lang: count / total_chars 
-                for lang, count in language_counts.items()
-            }
-            
             # Determine primary language
-            if not language_percentages:
-                return Language.UNKNOWN, 0.0
-            
-            primary_lang = max(language_percentages, key=language_percentages.get)
-            primary_confidence = language_percentages[primary_lang]
+            primary_lang, primary_confidence = languages[0]
             
             # Check for mixed language
             significant_languages = [
-                lang for lang, pct in language_percentages.items() 
+                lang for lang, pct in languages
                 if pct > 0.2  # More than 20%
             ]
             
@@ -158,32 +203,12 @@ class MultilingualHandler:
     def detect_all_languages(self, text: str) -> List[Tuple[Language, float]]:
         """Detect all languages present in text"""
         try:
-            clean_text = re.sub(r'[^\w\s\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]', '', text)
+            _, languages = self._language_breakdown(text)
             
-            if not clean_text.strip():
+            if not languages:
                 return [(Language.UNKNOWN, 0.0)]
             
-            language_counts = {}
-            total_chars = 0
-            
-            for language, pattern in self.language_patterns.items():
-                matches = re.findall(pattern, clean_text)
-                count = len(matches)
-                if count > 0:
-                    language_counts[language] = count
-                    total_chars += count
-            
-            if total_chars == 0:
-                return [(Language.UNKNOWN, 0.0)]
-            
-            # Calculate percentages and sort
-            results = [
-                (lang, count / total_chars)
-                for lang, count in language_counts.items()
-            ]
-            results.sort(key=lambda x: x[1], reverse=True)
-            
-            return results
+            return list(languages)
             
         except Exception as e:
             logger.error(f"Multi-language detection failed: {e}")
@@ -221,29 +246,26 @@ class MultilingualHandler:
     
     def _detect_char_language(self, char: str) -> Language:
         """Detect language of a single character"""
-        for language, pattern in self.language_patterns.items():
-            if re.match(pattern, char):
-                return language
+        code_point = ord(char)
+        i = bisect_right(self._range_starts, code_point) - 1
+        if i >= 0 and code_point <= self._range_ends[i]:
+            return self._range_languages[i]
         return Language.UNKNOWN
     
     def normalize_text(self, text: str, target_language: Language) -> str:
         """Normalize text for specific language"""
         try:
-            if target_language == Language.CHINESE:
-                return self._normalize_chinese(text)
-            elif target_language == Language.ENGLISH:
-                return self._normalize_english(text)
-            elif target_language == Language.JAPANESE:
-                return self._normalize_japanese(text)
-            elif target_language == Language.KOREAN:
-                return self._normalize_korean(text)
-            else:
-                return text
+            return self._normalizers.get(target_language, self._identity)(text)
                 
         except Exception as e:
             logger.error(f"Text normalization failed: {e}")
             return text
     
+    @staticmethod
+    def _identity(text: str) -> str:
+        """Return text unchanged (languages without a normalizer)"""
+        return text
+    
     def _normalize_chinese(self, text: str) -> str:
         """Normalize Chinese text"""
         # Convert full-width characters to half-width
@@ -342,12 +364,13 @@ class MultilingualHandler:
         try:
             languages = self.detect_all_languages(text)
             primary_language, primary_confidence = self.detect_language(text)
+            is_mixed = sum(1 for _, conf in languages if conf > 0.2) > 1
             
             analysis = {
                 "primary_language": primary_language,
                 "primary_confidence": primary_confidence,
                 "all_languages": languages,
-                "is_mixed": self.is_mixed_language(text),
+                "is_mixed": is_mixed,
                 "character_count": len(text),
                 "word_count": len(text.split()),
                 "complexity": "simple"
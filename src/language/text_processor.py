@@ -3,13 +3,17 @@ Text Processor - Handles text preprocessing for TTS
 """
 import re
 import logging
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Any, List, Dict, Optional, Tuple
 
 try:
-    import jieba
+    import jieba_fast as jieba  # C-accelerated drop-in for jieba
 except ImportError:
-    jieba = None
-    print("Warning: jieba not installed. Install with: pip install jieba")
+    try:
+        import jieba
+    except ImportError:
+        jieba = None
+        print("Warning: jieba not installed. Install with: pip install jieba")
 
 try:
     from opencc import OpenCC
@@ -23,16 +27,91 @@ except ImportError:
     emoji = None
     print("Warning: emoji not installed. Install with: pip install emoji")
 
+# Optional: google-re2 gives linear-time matching for the cleaning patterns
+# (notably the URL one, which backtracks in re on long inputs)
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used on every process_text call
+_WS_RE = re.compile(r'\s+')
+_URL_RE = (re2 or re).compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_EMAIL_RE = (re2 or re).compile(r'\S+@\S+')
+_REPEATED_PUNCT_RE = (re2 or re).compile(r'[.]{3,}|[!]{2,}|[?]{2,}')
+_NON_TEXT_RE = re.compile(r'[^\w\s\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff\u3040-\u309f\u30a0-\u30ff.,!?;:()[\]{}"\'-]')
+_CN_END_RE = re.compile(r'([。！？])')
+_CN_MID_RE = re.compile(r'([，、；：])')
+_NUM_RE = re.compile(r'(\d+)')
+_EN_END_RE = re.compile(r'([.!?])')
+_EN_MID_RE = re.compile(r'([,;:])')
+_CN_CHAR_RE = re.compile(r'[\u4e00-\u9fff]')
+_LETTER_RE = re.compile(r'[a-zA-Z]')
+_PUNCT_SPACE_RE = re.compile(r'\s+([.!?,:;])')
+
+_CHINESE_DIGITS = "零一二三四五六七八九"
+_DIGIT_TABLE = str.maketrans("0123456789", _CHINESE_DIGITS)
+
+# Every non-ASCII code point that occurs in some emoji; text sharing none of
+# them cannot contain an emoji and skips the (pure Python) emoji scanner
+_EMOJI_CODEPOINTS = frozenset(
+    char for sequence in emoji.EMOJI_DATA for char in sequence if ord(char) > 0x7F
+) if emoji else frozenset()
+
+# Joiners and modifiers that can bind a single emoji into a longer sequence
+_EMOJI_MODIFIERS = frozenset('\u200d\ufe0e\ufe0f\u20e3' + ''.join(map(chr, range(0x1F3FB, 0x1F400))))
+
+# Emotion words checked by extract_emotions, matched against lowercased text
+_EMOTION_WORDS = (
+    ("happy", ("开心", "高兴", "快乐", "happy", "joy", "glad")),
+    ("sad", ("伤心", "难过", "悲伤", "sad", "sorrow", "upset")),
+    ("excited", ("兴奋", "激动", "excited", "thrilled")),
+    ("angry", ("生气", "愤怒", "angry", "mad")),
+    ("surprised", ("惊讶", "震惊", "surprised", "shocked")),
+    ("calm", ("平静", "冷静", "calm", "peaceful")),
+)
+
+
+def _squash_punctuation(match) -> str:
+    """Cap a run of dots at '...' and a run of '!' or '?' at two"""
+    run = match.group()
+    return run[:3] if run[0] == '.' else run[:2]
+
+
+def _compile_alternation(table: Dict[str, str]) -> re.Pattern:
+    """
+    Compile the keys of a replacement table into a single alternation.
+    
+    Longest keys come first so a longer key (e.g. "--") is not pre-empted
+    by one of its prefixes ("-").
+    """
+    return re.compile("|".join(
+        re.escape(key) for key in sorted(table, key=len, reverse=True)
+    ))
+
+
+def _count_cn_en(text: str) -> Tuple[int, int]:
+    """Count Chinese characters and ASCII letters in text"""
+    return len(_CN_CHAR_RE.findall(text)), len(_LETTER_RE.findall(text))
+
 
 class TextProcessor:
     """Text preprocessing for multilingual TTS"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 2048):
         self.chinese_converter = None
         self.emoji_enabled = emoji is not None
         
+        # Load the segmentation dictionary now rather than on the first
+        # live utterance
+        if jieba:
+            try:
+                jieba.initialize()
+            except Exception as e:
+                logger.warning(f"Failed to initialize jieba: {e}")
+        
         # Initialize Chinese converter
         if OpenCC:
             try:
@@ -61,6 +140,25 @@ class TextProcessor:
             "!!": "！", "??": "？", "!?": "！？",
         }
         
+        # English contractions
+        self.contractions = {
+            "won't": "will not", "can't": "cannot", "n't": " not",
+            "'re": " are", "'ve": " have", "'ll": " will",
+            "'d": " would", "'m": " am", "'s": " is"
+        }
+        
+        # English abbreviations
+        self.abbreviations = {
+            "Mr.": "Mister", "Mrs.": "Missus", "Dr.": "Doctor",
+            "Prof.": "Professor", "vs.": "versus", "etc.": "etcetera",
+            "i.e.": "that is", "e.g.": "for example"
+        }
+        
+        # Each table is applied in one pass; see _compile_alternation
+        self._replacements_re = _compile_alternation(self.replacements)
+        self._contractions_re = _compile_alternation(self.contractions)
+        self._abbreviations_re = _compile_alternation(self.abbreviations)
+        
         # Emotion markers
         self.emotion_markers = {
             "happy": ["😊", "😄", "😃", "🥰", "😍", "🤗"],
@@ -70,9 +168,52 @@ class TextProcessor:
             "surprised": ["😲", "😮", "🤯", "😱"],
             "sleepy": ["😴", "💤", "😪", "🥱"],
         }
+        
+        # Reverse lookup for emoji replacement, and the first character of
+        # every marker so extract_emotions can skip texts without any
+        self._emoji_to_emotion = {
+            marker: emotion
+            for emotion, markers in self.emotion_markers.items()
+            for marker in markers
+        }
+        self._emotion_marker_initials = frozenset(marker[0] for marker in self._emoji_to_emotion)
+        self._emoji_translate = {
+            ord(marker): f" *{emotion}* "
+            for marker, emotion in self._emoji_to_emotion.items()
+            if len(marker) == 1
+        }
+        
+        # Chat streams repeat the same short texts a lot and the pipeline is
+        # deterministic, so results are kept in a bounded LRU cache
+        self._process_text_cached = lru_cache(maxsize=cache_size)(self._process_text)
     
     def process_text(self, text: str, language: str = "auto") -> str:
-        """Main text processing pipeline"""
+        """Main text processing pipeline (memoized per text/language)"""
+        return self._process_text_cached(text, language)
+    
+    def process_batch(self, texts: List[str], language: str = "auto") -> List[str]:
+        """Process several texts; repeats within the batch hit the cache"""
+        process = self._process_text_cached
+        return [process(text, language) for text in texts]
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get process_text cache statistics"""
+        info = self._process_text_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0
+        }
+    
+    def clear_cache(self):
+        """Clear the process_text cache (e.g. after editing the replacement tables)"""
+        self._process_text_cached.cache_clear()
+    
+    def _process_text(self, text: str, language: str) -> str:
+        """Uncached text processing pipeline"""
         try:
             # Basic cleaning
             processed_text = self._clean_text(text)
@@ -80,20 +221,17 @@ class TextProcessor:
             # Handle emojis
             processed_text = self._process_emojis(processed_text)
             
-            # Language-specific processing
-            if language == "zh" or self._is_chinese(processed_text):
+            # Language-specific processing. Anything not treated as Chinese
+            # (explicit "en", detected English, or undetermined) goes down
+            # the English path.
+            is_chinese = language == "zh" or self._is_chinese(processed_text)
+            if is_chinese:
                 processed_text = self._process_chinese(processed_text)
-            elif language == "en" or self._is_english(processed_text):
-                processed_text = self._process_english(processed_text)
             else:
-                # Auto-detect and process
-                if self._is_chinese(processed_text):
-                    processed_text = self._process_chinese(processed_text)
-                else:
-                    processed_text = self._process_english(processed_text)
+                processed_text = self._process_english(processed_text)
             
             # Final cleanup
-            processed_text = self._final_cleanup(processed_text)
+            processed_text = self._final_cleanup(processed_text, is_chinese)
             
             return processed_text
             
@@ -104,18 +242,16 @@ class TextProcessor:
     def _clean_text(self, text: str) -> str:
         """Basic text cleaning"""
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         # Remove URLs
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+        text = _URL_RE.sub('', text)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
+        text = _EMAIL_RE.sub('', text)
         
         # Remove excessive punctuation
-        text = re.sub(r'[.]{3,}', '...', text)
-        text = re.sub(r'[!]{2,}', '!!', text)
-        text = re.sub(r'[?]{2,}', '??', text)
+        text = _REPEATED_PUNCT_RE.sub(_squash_punctuation, text)
         
         return text
     
@@ -123,28 +259,21 @@ class TextProcessor:
         """Process emojis in text"""
         if not self.emoji_enabled:
             # Simple emoji removal if emoji library not available
-            return re.sub(r'[^\w\s\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff\u3040-\u309f\u30a0-\u30ff.,!?;:()[\]{}"\'-]', '', text)
+            return _NON_TEXT_RE.sub('', text)
+        
+        if _EMOJI_CODEPOINTS.isdisjoint(text):
+            return text
         
         try:
-            # Convert emojis to text descriptions
-            def emoji_to_text(match):
-                emoji_char = match.group()
-                # Get emoji description
-                description = emoji.demojize(emoji_char, delimiters=("", ""))
-                
-                # Map to emotion if possible
-                for emotion, emoji_list in self.emotion_markers.items():
-                    if emoji_char in emoji_list:
-                        return f" *{emotion}* "
-                
-                # Return description or remove
-                if description != emoji_char:
-                    return f" {description} "
-                else:
-                    return " "
+            # Map standalone emotion emojis in one translate pass; the full
+            # scanner only runs for whatever emojis are left after that
+            if _EMOJI_MODIFIERS.isdisjoint(text):
+                text = text.translate(self._emoji_translate)
+                if _EMOJI_CODEPOINTS.isdisjoint(text):
+                    return text
             
             # Replace emojis
-            text = emoji.replace_emoji(text, replace=emoji_to_text)
+            text = emoji.replace_emoji(text, replace=self._emoji_to_text)
             
             return text
             
@@ -152,6 +281,20 @@ class TextProcessor:
             logger.error(f"Emoji processing failed: {e}")
             return text
     
+    def _emoji_to_text(self, emoji_char: str, data: Optional[Dict] = None) -> str:
+        """Convert a single emoji to an emotion tag or text description"""
+        # Map to emotion if possible
+        emotion = self._emoji_to_emotion.get(emoji_char)
+        if emotion:
+            return f" *{emotion}* "
+        
+        # Return description or remove
+        description = emoji.demojize(emoji_char, delimiters=("", ""))
+        if description != emoji_char:
+            return f" {description} "
+        else:
+            return " "
+    
     def _process_chinese(self, text: str) -> str:
         """Process Chinese text"""
         try:
@@ -160,15 +303,14 @@ class TextProcessor:
                 text = self.chinese_converter.convert(text)
             
             # Handle Chinese numbers and symbols
-            for old, new in self.replacements.items():
-                text = text.replace(old, new)
+            text = self._replacements_re.sub(self._lookup_replacement, text)
             
             # Add pauses for better speech rhythm
-            text = re.sub(r'([。！？])', r'\1 ', text)
-            text = re.sub(r'([，、；：])', r'\1', text)
+            text = _CN_END_RE.sub(r'\1 ', text)
+            text = _CN_MID_RE.sub(r'\1', text)
             
             # Handle Chinese-specific patterns
-            text = re.sub(r'(\d+)', self._number_to_chinese, text)
+            text = _NUM_RE.sub(self._number_to_chinese, text)
             
             return text
             
@@ -180,28 +322,14 @@ class TextProcessor:
         """Process English text"""
         try:
             # Expand contractions
-            contractions = {
-                "won't": "will not", "can't": "cannot", "n't": " not",
-                "'re": " are", "'ve": " have", "'ll": " will",
-                "'d": " would", "'m": " am", "'s": " is"
-            }
-            
-            for contraction, expansion in contractions.items():
-                text = text.replace(contraction, expansion)
+            text = self._contractions_re.sub(self._expand_contraction, text)
             
             # Handle abbreviations
-            abbreviations = {
-                "Mr.": "Mister", "Mrs.": "Missus", "Dr.": "Doctor",
-                "Prof.": "Professor", "vs.": "versus", "etc.": "etcetera",
-                "i.e.": "that is", "e.g.": "for example"
-            }
-            
-            for abbr, full in abbreviations.items():
-                text = text.replace(abbr, full)
+            text = self._abbreviations_re.sub(self._expand_abbreviation, text)
             
             # Add pauses for better speech rhythm
-            text = re.sub(r'([.!?])', r'\1 ', text)
-            text = re.sub(r'([,;:])', r'\1', text)
+            text = _EN_END_RE.sub(r'\1 ', text)
+            text = _EN_MID_RE.sub(r'\1', text)
             
             return text
             
@@ -209,47 +337,56 @@ class TextProcessor:
             logger.error(f"English processing failed: {e}")
             return text
     
+    def _lookup_replacement(self, match) -> str:
+        """Map a matched replacement key to its spoken form"""
+        return self.replacements[match.group()]
+    
+    def _expand_contraction(self, match) -> str:
+        """Map a matched contraction to its expansion"""
+        return self.contractions[match.group()]
+    
+    def _expand_abbreviation(self, match) -> str:
+        """Map a matched abbreviation to its full form"""
+        return self.abbreviations[match.group()]
+    
     def _number_to_chinese(self, match) -> str:
         """Convert numbers to Chinese"""
-        try:
-            number = match.group()
-            if len(number) <= 2:  # Simple numbers
-                chinese_digits = "零一二三四五六七八九"
-                result = ""
-                for digit in number:
-                    result += chinese_digits[int(digit)]
-                return result
-            else:
-                return number  # Keep complex numbers as is
-        except:
-            return match.group()
+        number = match.group()
+        if len(number) > 2:
+            return number  # Keep complex numbers as is
+        
+        # Simple numbers
+        if number.isascii():
+            return number.translate(_DIGIT_TABLE)
+        # \d also matches non-ASCII decimal digits (e.g. full-width)
+        return "".join(_CHINESE_DIGITS[int(digit)] for digit in number)
     
     def _is_chinese(self, text: str) -> bool:
         """Check if text is primarily Chinese"""
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        total_chars = len(re.findall(r'[a-zA-Z\u4e00-\u9fff]', text))
+        chinese_chars, english_chars = _count_cn_en(text)
+        total_chars = chinese_chars + english_chars
         return total_chars > 0 and chinese_chars / total_chars > 0.5
     
     def _is_english(self, text: str) -> bool:
         """Check if text is primarily English"""
-        english_chars = len(re.findall(r'[a-zA-Z]', text))
-        total_chars = len(re.findall(r'[a-zA-Z\u4e00-\u9fff]', text))
+        chinese_chars, english_chars = _count_cn_en(text)
+        total_chars = chinese_chars + english_chars
         return total_chars > 0 and english_chars / total_chars > 0.5
     
-    def _final_cleanup(self, text: str) -> str:
+    def _final_cleanup(self, text: str, is_chinese: bool) -> str:
         """Final text cleanup"""
         # Remove excessive spaces
-        text = re.sub(r'\s+', ' ', text)
+        text = _WS_RE.sub(' ', text)
         
         # Ensure proper punctuation spacing
-        text = re.sub(r'\s+([.!?,:;])', r'\1', text)
+        text = _PUNCT_SPACE_RE.sub(r'\1', text)
         
         # Remove leading/trailing spaces
         text = text.strip()
         
         # Ensure text ends with punctuation for better speech
         if text and text[-1] not in '.!?。！？':
-            if self._is_chinese(text):
+            if is_chinese:
                 text += '。'
             else:
                 text += '.'
@@ -261,24 +398,16 @@ class TextProcessor:
         emotions = []
         
         # Check for emotion markers
-        for emotion, markers in self.emotion_markers.items():
-            for marker in markers:
-                if marker in text:
-                    emotions.append(emotion)
-                    break
+        if not self._emotion_marker_initials.isdisjoint(text):
+            for emotion, markers in self.emotion_markers.items():
+                for marker in markers:
+                    if marker in text:
+                        emotions.append(emotion)
+                        break
         
         # Check for emotion words
-        emotion_words = {
-            "happy": ["开心", "高兴", "快乐", "happy", "joy", "glad"],
-            "sad": ["伤心", "难过", "悲伤", "sad", "sorrow", "upset"],
-            "excited": ["兴奋", "激动", "excited", "thrilled"],
-            "angry": ["生气", "愤怒", "angry", "mad"],
-            "surprised": ["惊讶", "震惊", "surprised", "shocked"],
-            "calm": ["平静", "冷静", "calm", "peaceful"],
-        }
-        
         text_lower = text.lower()
-        for emotion, words in emotion_words.items():
+        for emotion, words in _EMOTION_WORDS:
             for word in words:
                 if word in text_lower:
                     emotions.append(emotion)
@@ -286,11 +415,23 @@ class TextProcessor:
         
         return list(set(emotions))  # Remove duplicates
     
-    def segment_chinese(self, text: str) -> List[str]:
-        """Segment Chinese text using jieba"""
+    def extract_emotions_batch(self, texts: List[str]) -> List[List[str]]:
+        """Extract emotion indicators from several texts"""
+        return [self.extract_emotions(text) for text in texts]
+    
+    def segment_chinese(self, text: str, cut_all: bool = False, HMM: bool = True) -> List[str]:
+        """
+        Segment Chinese text using jieba
+        
+        Args:
+            text: Text to segment
+            cut_all: Use full mode (all possible words) instead of accurate mode
+            HMM: Use the HMM model for unknown words; disable for a faster
+                 dictionary-only cut when accuracy is less important
+        """
         if jieba and self._is_chinese(text):
             try:
-                return list(jieba.cut(text))
+                return list(jieba.cut(text, cut_all=cut_all, HMM=HMM))
             except Exception as e:
                 logger.error(f"Chinese segmentation failed: {e}")
         
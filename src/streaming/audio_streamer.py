@@ -3,8 +3,8 @@ Audio Streamer - Handles real-time audio streaming for live platforms
 """
 import asyncio
 import threading
-import queue
 import time
+from collections import deque
 import numpy as np
 from typing import Optional, Callable, Generator, Any
 import logging
@@ -15,6 +15,11 @@ except ImportError:
     pyaudio = None
     print("Warning: PyAudio not installed. Install with: pip install pyaudio")
 
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None
+
 try:
     import soundfile as sf
 except ImportError:
@@ -26,6 +31,13 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+def _float_to_int16(samples: np.ndarray) -> np.ndarray:
+    """Clip float samples to [-1, 1] and scale them to int16"""
+    scaled = np.clip(samples, -1.0, 1.0)
+    scaled *= 32767
+    return scaled.astype(np.int16)
+
+
 class AudioStreamer:
     """Real-time audio streaming manager"""
     
@@ -35,20 +47,36 @@ class AudioStreamer:
         self.chunk_size = settings.chunk_size
         self.format = pyaudio.paInt16 if pyaudio else None
         
-        self.audio_queue = queue.Queue(maxsize=100)
+        # Single producer (queue_audio) / single consumer (output callback):
+        # deque append/popleft are atomic, so the realtime callback never locks
+        self.audio_queue = deque(maxlen=100)
+        # Producers blocked on a full queue wait here; consumers only take the
+        # lock to wake them when someone is actually waiting
+        self._queue_space = threading.Condition()
+        self._space_waiters = 0
         self.output_stream = None
         self.input_stream = None
         self.pyaudio_instance = None
         
         self.is_streaming = False
         self.is_recording = False
-        self.stream_thread = None
         self.callback_function = None
         
         # Performance monitoring
         self.latency_ms = 0
         self.buffer_underruns = 0
         self.last_audio_time = 0
+        self._frames_since_log = 0
+        self._queued = 0
+        self._consumed = 0
+        
+        # Partly played chunk carried between sounddevice callbacks
+        self._pending_chunk = None
+        self._pending_offset = 0
+        
+        # Silence buffers keyed by frame count, so underruns don't allocate
+        self._silence_cache = {}
+        self._silence(self.chunk_size)
     
     def initialize(self) -> bool:
         """Initialize audio streaming system"""
@@ -68,6 +96,11 @@ class AudioStreamer:
     def start_output_stream(self, callback: Optional[Callable] = None) -> bool:
         """Start audio output stream"""
         try:
+            # sounddevice hands the callback a numpy buffer to fill in place,
+            # so prefer it for the queue-driven output stream
+            if not callback and sd is not None:
+                return self._start_sd_output_stream()
+            
             if not self.pyaudio_instance:
                 if not self.initialize():
                     return False
@@ -86,12 +119,6 @@ class AudioStreamer:
             
             self.is_streaming = True
             
-            # Start streaming thread if no callback provided
-            if not callback:
-                self.stream_thread = threading.Thread(target=self._stream_worker)
-                self.stream_thread.daemon = True
-                self.stream_thread.start()
-            
             logger.info("Audio output stream started")
             return True
             
@@ -99,6 +126,24 @@ class AudioStreamer:
             logger.error(f"Failed to start output stream: {e}")
             return False
     
+    def _start_sd_output_stream(self) -> bool:
+        """Start the queue-driven output stream on sounddevice"""
+        self.callback_function = None
+        self._pending_chunk = None
+        self.output_stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype='int16',
+            blocksize=self.chunk_size,
+            callback=self._sd_output_callback
+        )
+        self.output_stream.start()
+        
+        self.is_streaming = True
+        
+        logger.info("Audio output stream started (sounddevice)")
+        return True
+    
     def start_input_stream(self) -> bool:
         """Start audio input stream (for monitoring/feedback)"""
         try:
@@ -126,33 +171,115 @@ class AudioStreamer:
     def _output_callback(self, in_data, frame_count, time_info, status):
         """PyAudio output callback"""
         try:
+            self._log_stream_metrics(frame_count)
+            
             # Get audio data from queue
-            if not self.audio_queue.empty():
-                audio_data = self.audio_queue.get_nowait()
-                
-                # Convert to bytes if needed
+            audio_data = self._pop_chunk()
+            
+            if audio_data is not None:
+                # Convert to bytes if needed (queue_audio already queues int16)
                 if isinstance(audio_data, np.ndarray):
-                    audio_data = (audio_data * 32767).astype(np.int16).tobytes()
+                    if audio_data.dtype != np.int16:
+                        audio_data = _float_to_int16(audio_data)
+                    audio_data = audio_data.tobytes()
                 
                 # Pad or truncate to frame_count
                 required_bytes = frame_count * self.channels * 2  # 2 bytes per int16
                 if len(audio_data) < required_bytes:
-                    audio_data += b'\x00' * (required_bytes - len(audio_data))
+                    audio_data = audio_data.ljust(required_bytes, b'\x00')
                 elif len(audio_data) > required_bytes:
                     audio_data = audio_data[:required_bytes]
                 
-                self.last_audio_time = time.time()
+                self.last_audio_time = time.monotonic()
                 return (audio_data, pyaudio.paContinue)
             else:
                 # No audio available - output silence
                 self.buffer_underruns += 1
-                silence = b'\x00' * (frame_count * self.channels * 2)
-                return (silence, pyaudio.paContinue)
+                return (self._silence(frame_count), pyaudio.paContinue)
+                
+        except Exception as e:
+            logger.error(f"Output callback error: {e}")
+            return (self._silence(frame_count), pyaudio.paContinue)
+    
+    def _sd_output_callback(self, outdata, frames, time_info, status):
+        """sounddevice output callback, copies queued frames into outdata"""
+        try:
+            self._log_stream_metrics(frames)
+            
+            filled = 0
+            while filled < frames:
+                chunk = self._pending_chunk
+                if chunk is None:
+                    chunk = self._pop_chunk()
+                    if chunk is None:
+                        break
+                    if chunk.dtype != np.int16:
+                        chunk = _float_to_int16(chunk)
+                    self._pending_chunk = chunk = chunk.reshape(-1, self.channels)
+                    self._pending_offset = 0
+                
+                # Copy as much of the chunk as fits, keep the rest for next time
+                offset = self._pending_offset
+                count = min(frames - filled, len(chunk) - offset)
+                outdata[filled:filled + count] = chunk[offset:offset + count]
+                filled += count
+                offset += count
+                if offset >= len(chunk):
+                    self._pending_chunk = None
+                else:
+                    self._pending_offset = offset
+            
+            if filled:
+                self.last_audio_time = time.monotonic()
+            else:
+                self.buffer_underruns += 1
+            if filled < frames:
+                outdata[filled:] = 0
                 
         except Exception as e:
             logger.error(f"Output callback error: {e}")
-            silence = b'\x00' * (frame_count * self.channels * 2)
-            return (silence, pyaudio.paContinue)
+            outdata.fill(0)
+    
+    def _log_stream_metrics(self, frame_count: int):
+        """Log performance metrics once per 10 seconds of played audio"""
+        self._frames_since_log += frame_count
+        if self._frames_since_log >= self.sample_rate * 10:
+            self._frames_since_log = 0
+            self._update_latency()
+            logger.debug(f"Queue size: {len(self.audio_queue)}, Latency: {self.latency_ms:.1f}ms, "
+                       f"Buffer underruns: {self.buffer_underruns}")
+    
+    def _pop_chunk(self) -> Optional[Any]:
+        """Take the next queued chunk, waking a blocked producer"""
+        try:
+            chunk = self.audio_queue.popleft()
+        except IndexError:
+            return None
+        
+        self._consumed += 1
+        if self._space_waiters:
+            with self._queue_space:
+                self._queue_space.notify()
+        return chunk
+    
+    def _wait_for_space(self, timeout: Optional[float]):
+        """Block until the queue has room or streaming stops"""
+        with self._queue_space:
+            self._space_waiters += 1
+            try:
+                self._queue_space.wait_for(
+                    lambda: len(self.audio_queue) < self.audio_queue.maxlen or not self.is_streaming,
+                    timeout
+                )
+            finally:
+                self._space_waiters -= 1
+    
+    def _silence(self, frame_count: int) -> bytes:
+        """Get a cached silent buffer for frame_count frames"""
+        silence = self._silence_cache.get(frame_count)
+        if silence is None:
+            silence = self._silence_cache[frame_count] = b'\x00' * (frame_count * self.channels * 2)
+        return silence
     
     def _input_callback(self, in_data, frame_count, time_info, status):
         """PyAudio input callback"""
@@ -167,54 +294,49 @@ class AudioStreamer:
             logger.error(f"Input callback error: {e}")
             return (in_data, pyaudio.paContinue)
     
-    def _stream_worker(self):
-        """Background streaming worker thread"""
-        while self.is_streaming:
-            try:
-                # Monitor queue size and latency
-                queue_size = self.audio_queue.qsize()
-                current_time = time.time()
-                
-                if self.last_audio_time > 0:
-                    self.latency_ms = (current_time - self.last_audio_time) * 1000
-                
-                # Log performance metrics periodically
-                if int(current_time) % 10 == 0:  # Every 10 seconds
-                    logger.debug(f"Queue size: {queue_size}, Latency: {self.latency_ms:.1f}ms, "
-                               f"Buffer underruns: {self.buffer_underruns}")
-                
-                time.sleep(0.1)  # Check every 100ms
-                
-            except Exception as e:
-                logger.error(f"Stream worker error: {e}")
-                time.sleep(1)
+    def _update_latency(self):
+        """Refresh latency_ms from the time the last audio frame was played"""
+        if self.is_streaming and self.last_audio_time > 0:
+            self.latency_ms = (time.monotonic() - self.last_audio_time) * 1000
     
-    def queue_audio(self, audio_data: np.ndarray) -> bool:
-        """Queue audio data for streaming"""
+    def queue_audio(self, audio_data: np.ndarray, block: bool = False, timeout: Optional[float] = 0.5) -> bool:
+        """Queue audio data for streaming, optionally waiting for room"""
         try:
             if not self.is_streaming:
                 return False
             
             # Convert numpy array to appropriate format
             if isinstance(audio_data, np.ndarray):
-                # Ensure correct shape and type
-                if audio_data.ndim == 1:
-                    audio_data = audio_data.reshape(-1, 1) if self.channels == 1 else np.column_stack([audio_data, audio_data])
-                
                 # Normalize and convert to int16
-                audio_data = np.clip(audio_data, -1.0, 1.0)
-                audio_int16 = (audio_data * 32767).astype(np.int16)
-                
-                # Add to queue
-                if not self.audio_queue.full():
-                    self.audio_queue.put(audio_int16)
-                    return True
-                else:
-                    logger.warning("Audio queue full, dropping frame")
-                    return False
+                audio_int16 = _float_to_int16(audio_data)
+            elif isinstance(audio_data, (bytes, bytearray, memoryview)):
+                # PCM16 chunks from the byte-oriented streaming paths, viewed without a copy
+                audio_int16 = np.frombuffer(audio_data, dtype=np.int16)
             else:
                 logger.error("Invalid audio data type")
                 return False
+            
+            # Ensure correct shape; mono input is converted once and
+            # broadcast into every output channel
+            if audio_int16.ndim == 1:
+                if self.channels == 1:
+                    audio_int16 = audio_int16.reshape(-1, 1)
+                else:
+                    interleaved = np.empty((audio_int16.size, self.channels), dtype=np.int16)
+                    interleaved[:] = audio_int16[:, None]
+                    audio_int16 = interleaved
+            
+            # Add to queue
+            if len(self.audio_queue) >= self.audio_queue.maxlen and block:
+                self._wait_for_space(timeout)
+            
+            if len(self.audio_queue) < self.audio_queue.maxlen:
+                self.audio_queue.append(audio_int16)
+                self._queued += 1
+                return True
+            else:
+                logger.warning("Audio queue full, dropping frame")
+                return False
                 
         except Exception as e:
             logger.error(f"Failed to queue audio: {e}")
@@ -228,10 +350,8 @@ class AudioStreamer:
                     break
                 
                 if audio_chunk is not None:
-                    self.queue_audio(audio_chunk)
-                
-                # Small delay to prevent overwhelming the queue
-                time.sleep(0.001)
+                    # Blocking put paces the generator to the playback speed
+                    self.queue_audio(audio_chunk, block=True)
                 
         except Exception as e:
             logger.error(f"Audio generator streaming failed: {e}")
@@ -243,21 +363,24 @@ class AudioStreamer:
                 logger.error("SoundFile not available for saving")
                 return False
             
-            # Collect audio data for specified duration
-            audio_data = []
-            start_time = time.time()
+            # Collect audio data for specified duration straight into one buffer
+            total_samples = int(self.sample_rate * duration_seconds)
+            full_audio = np.empty((total_samples, self.channels), dtype=np.int16)
+            position = 0
+            start_time = time.monotonic()
             
-            while time.time() - start_time < duration_seconds:
-                if not self.audio_queue.empty():
-                    chunk = self.audio_queue.get()
-                    if isinstance(chunk, np.ndarray):
-                        audio_data.append(chunk)
-                time.sleep(0.01)
+            while position < total_samples and time.monotonic() - start_time < duration_seconds:
+                chunk = self._pop_chunk()
+                if not isinstance(chunk, np.ndarray):
+                    time.sleep(0.005)
+                    continue
+                
+                count = min(len(chunk), total_samples - position)
+                full_audio[position:position + count] = chunk[:count]
+                position += count
             
-            if audio_data:
-                # Concatenate and save
-                full_audio = np.concatenate(audio_data, axis=0)
-                sf.write(filename, full_audio, self.sample_rate)
+            if position:
+                sf.write(filename, full_audio[:position], self.sample_rate)
                 logger.info(f"Stream saved to {filename}")
                 return True
             else:
@@ -270,10 +393,13 @@ class AudioStreamer:
     
     def get_stream_stats(self) -> dict:
         """Get streaming statistics"""
+        self._update_latency()
         return {
             "is_streaming": self.is_streaming,
             "is_recording": self.is_recording,
-            "queue_size": self.audio_queue.qsize(),
+            "queue_size": len(self.audio_queue),
+            "chunks_queued": self._queued,
+            "chunks_consumed": self._consumed,
             "latency_ms": self.latency_ms,
             "buffer_underruns": self.buffer_underruns,
             "sample_rate": self.sample_rate,
@@ -284,6 +410,7 @@ class AudioStreamer:
     def adjust_latency(self, target_latency_ms: float = 200.0):
         """Adjust streaming parameters to achieve target latency"""
         try:
+            self._update_latency()
             current_latency = self.latency_ms
             
             if current_latency > target_latency_ms * 1.5:
@@ -306,19 +433,24 @@ class AudioStreamer:
             self.is_streaming = False
             self.is_recording = False
             
+            # Release producers blocked on a full queue
+            with self._queue_space:
+                self._queue_space.notify_all()
+            
             if self.output_stream:
-                self.output_stream.stop_stream()
+                if sd is not None and isinstance(self.output_stream, sd.OutputStream):
+                    self.output_stream.stop()
+                else:
+                    self.output_stream.stop_stream()
                 self.output_stream.close()
                 self.output_stream = None
+                self._pending_chunk = None
             
             if self.input_stream:
                 self.input_stream.stop_stream()
                 self.input_stream.close()
                 self.input_stream = None
             
-            if self.stream_thread and self.stream_thread.is_alive():
-                self.stream_thread.join(timeout=2.0)
-            
             logger.info("Audio streaming stopped")
             
         except Exception as e:
@@ -336,10 +468,6 @@ class AudioStreamer:
             self.pyaudio_instance = None
         
         # Clear queue
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        self.audio_queue.clear()
         
         logger.info("Audio streamer cleaned up")
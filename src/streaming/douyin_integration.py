@@ -4,7 +4,9 @@ Douyin Integration - Specialized integration for 抖音 (Douyin) live streaming
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, Callable
+import re
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Union
 import threading
 import time
 
@@ -14,10 +16,100 @@ except ImportError:
     websockets = None
     print("Warning: websockets not installed. Install with: pip install websockets")
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# orjson is a faster drop-in when installed; its JSONDecodeError subclasses
+# json.JSONDecodeError, so error handling is the same for both
+if orjson is not None:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+
+# Upper bound on messages handled per processor wakeup
+MAX_MESSAGE_BATCH = 256
+
+# Largest websocket frame accepted; chat/gift events are small JSON objects
+MAX_FRAME_SIZE = 64 * 1024
+
+# Protocol-level keepalive handled by websockets itself
+PING_INTERVAL = 20.0
+PING_TIMEOUT = 20.0
+
+_EMPTY: Dict[str, Any] = {}
+_now = time.time
+
+# The ping frame only varies in its timestamp; float repr is valid JSON
+_PING_PREFIX = '{"type":"ping","timestamp":'
+_PING_SUFFIX = '}'
+
+
+def _timestamp(data: Dict[str, Any]) -> Any:
+    """Message timestamp, or the current time when the frame has none"""
+    return data["timestamp"] if "timestamp" in data else _now()
+
+
+def _parse_chat(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "comment",
+        "user": data.get("user", _EMPTY).get("nickname", "Anonymous"),
+        "content": data.get("content", ""),
+        "timestamp": _timestamp(data)
+    }
+
+
+def _parse_gift(data: Dict[str, Any]) -> Dict[str, Any]:
+    gift = data.get("gift", _EMPTY)
+    return {
+        "type": "gift",
+        "user": data.get("user", _EMPTY).get("nickname", "Anonymous"),
+        "gift_name": gift.get("name", "Unknown"),
+        "gift_count": gift.get("count", 1),
+        "timestamp": _timestamp(data)
+    }
+
+
+def _parse_follow(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "follow",
+        "user": data.get("user", _EMPTY).get("nickname", "Anonymous"),
+        "timestamp": _timestamp(data)
+    }
+
+
+def _parse_like(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "like",
+        "user": data.get("user", _EMPTY).get("nickname", "Anonymous"),
+        "count": data.get("count", 1),
+        "timestamp": _timestamp(data)
+    }
+
+
+# Douyin message type -> parser producing our normalized message dict
+_MESSAGE_PARSERS = {
+    "chat": _parse_chat,
+    "gift": _parse_gift,
+    "follow": _parse_follow,
+    "like": _parse_like,
+}
+
 
 class DouyinIntegration:
     """Integration with 抖音 (Douyin) live streaming platform"""
@@ -33,6 +125,7 @@ class DouyinIntegration:
         self.on_gift_callback = None
         self.on_follow_callback = None
         self.on_like_callback = None
+        self._coroutine_callbacks: Dict[Callable, bool] = {}
         
         # Statistics
         self.stats = {
@@ -43,12 +136,24 @@ class DouyinIntegration:
             "viewers_count": 0
         }
         
-        # Message queue for processing
-        self.message_queue = asyncio.Queue()
+        # Message queue for processing: one producer (listener) and one
+        # consumer (processor), woken through a one-shot future when idle
+        self.message_queue = deque()
+        self._message_waiter: Optional[asyncio.Future] = None
         self.is_processing = False
+        self._tasks: List[asyncio.Task] = []
+        
+        # Parsed message type -> handler
+        self._message_handlers = {
+            "comment": self._handle_comment,
+            "gift": self._handle_gift,
+            "follow": self._handle_follow,
+            "like": self._handle_like,
+        }
     
-    async def connect(self, room_id: str, auth_token: Optional[str] = None) -> bool:
-        """Connect to Douyin live stream"""
+    async def connect(self, room_id: str, auth_token: Optional[str] = None,
+                      compression: Optional[str] = None) -> bool:
+        """Connect to Douyin live stream (pass compression="deflate" to enable permessage-deflate)"""
         try:
             if websockets is None:
                 logger.error("WebSockets library not available")
@@ -70,15 +175,21 @@ class DouyinIntegration:
                 extra_headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                     "Origin": "https://live.douyin.com"
-                }
+                },
+                compression=compression,
+                max_size=MAX_FRAME_SIZE,
+                ping_interval=PING_INTERVAL,
+                ping_timeout=PING_TIMEOUT
             )
             
             self.is_connected = True
             logger.info("✅ Connected to Douyin live stream")
             
             # Start message processing
-            asyncio.create_task(self._message_listener())
-            asyncio.create_task(self._message_processor())
+            self._tasks = [
+                asyncio.create_task(self._message_listener()),
+                asyncio.create_task(self._message_processor())
+            ]
             
             return True
             
@@ -91,6 +202,16 @@ class DouyinIntegration:
         try:
             self.is_connected = False
             self.is_processing = False
+            self._wake_processor()
+            
+            # Stop the listener/processor now instead of waiting for their
+            # recv/queue timeouts; skip the caller's own task (e.g. a callback)
+            current = asyncio.current_task()
+            tasks = [task for task in self._tasks if task is not current]
+            self._tasks = []
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             
             if self.websocket:
                 await self.websocket.close()
@@ -103,22 +224,22 @@ class DouyinIntegration:
     
     async def _message_listener(self):
         """Listen for messages from Douyin WebSocket"""
+        # Bound once; the loop runs for every inbound frame
+        parse_message = self._parse_douyin_message
+        enqueue_message = self._enqueue_message
+        
         try:
             while self.is_connected and self.websocket:
                 try:
-                    message = await asyncio.wait_for(
-                        self.websocket.recv(),
-                        timeout=30.0
-                    )
+                    # Keepalive pings are sent by websockets, so recv can
+                    # simply wait; a dead peer surfaces as ConnectionClosed
+                    message = await self.websocket.recv()
                     
                     # Parse message and add to queue
-                    parsed_message = self._parse_douyin_message(message)
+                    parsed_message = parse_message(message)
                     if parsed_message:
-                        await self.message_queue.put(parsed_message)
+                        enqueue_message(parsed_message)
                         
-                except asyncio.TimeoutError:
-                    # Send ping to keep connection alive
-                    await self._send_ping()
                 except Exception as e:
                     logger.error(f"Message listener error: {e}")
                     break
@@ -135,17 +256,25 @@ class DouyinIntegration:
         try:
             while self.is_processing:
                 try:
-                    # Get message from queue
-                    message = await asyncio.wait_for(
-                        self.message_queue.get(),
-                        timeout=1.0
-                    )
+                    # Wait for a message (or disconnect) if the queue is empty;
+                    # no timer is armed, the waiter is completed by whoever wakes us
+                    if not self.message_queue:
+                        self._message_waiter = asyncio.get_running_loop().create_future()
+                        try:
+                            await self._message_waiter
+                        finally:
+                            self._message_waiter = None
+                    
+                    # Drain everything that is ready in one pass, capped so the
+                    # listener still gets scheduled during gift/like storms
+                    queue = self.message_queue
+                    handle_message = self._handle_message
+                    for _ in range(min(len(queue), MAX_MESSAGE_BATCH)):
+                        await handle_message(queue.popleft())
                     
-                    # Process based on message type
-                    await self._handle_message(message)
+                    if queue:
+                        await asyncio.sleep(0)
                     
-                except asyncio.TimeoutError:
-                    continue
                 except Exception as e:
                     logger.error(f"Message processing error: {e}")
                     
@@ -154,53 +283,37 @@ class DouyinIntegration:
         finally:
             self.is_processing = False
     
-    def _parse_douyin_message(self, raw_message: str) -> Optional[Dict[str, Any]]:
+    def _enqueue_message(self, message: Dict[str, Any]):
+        """Queue a parsed message and wake the processor"""
+        self.message_queue.append(message)
+        self._wake_processor()
+    
+    def _wake_processor(self):
+        """Complete the processor's wakeup future if it is waiting"""
+        waiter = self._message_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+    
+    def _parse_douyin_message(self, raw_message: Union[str, bytes]) -> Optional[Dict[str, Any]]:
         """Parse raw Douyin message"""
         try:
             # This is a simplified parser - actual implementation would need
             # to handle Douyin's specific message format
             
-            if isinstance(raw_message, bytes):
-                raw_message = raw_message.decode('utf-8')
-            
-            # Try to parse as JSON
+            # Try to parse as JSON; both parsers take UTF-8 bytes directly
             try:
-                data = json.loads(raw_message)
+                data = _json_loads(raw_message)
             except json.JSONDecodeError:
                 # Handle non-JSON messages
+                if isinstance(raw_message, bytes):
+                    raw_message = raw_message.decode('utf-8')
                 return {"type": "raw", "content": raw_message}
             
-            # Extract message type and content
-            message_type = data.get("type", "unknown")
-            
-            if message_type == "chat":
-                return {
-                    "type": "comment",
-                    "user": data.get("user", {}).get("nickname", "Anonymous"),
-                    "content": data.get("content", ""),
-                    "timestamp": data.get("timestamp", time.time())
-                }
-            elif message_type == "gift":
-                return {
-                    "type": "gift",
-                    "user": data.get("user", {}).get("nickname", "Anonymous"),
-                    "gift_name": data.get("gift", {}).get("name", "Unknown"),
-                    "gift_count": data.get("gift", {}).get("count", 1),
-                    "timestamp": data.get("timestamp", time.time())
-                }
-            elif message_type == "follow":
-                return {
-                    "type": "follow",
-                    "user": data.get("user", {}).get("nickname", "Anonymous"),
-                    "timestamp": data.get("timestamp", time.time())
-                }
-            elif message_type == "like":
-                return {
-                    "type": "like",
-                    "user": data.get("user", {}).get("nickname", "Anonymous"),
-                    "count": data.get("count", 1),
-                    "timestamp": data.get("timestamp", time.time())
-                }
+            # Extract message type and content; unknown types pass through as-is
+            message_type = data.get("type")
+            parser = _MESSAGE_PARSERS.get(message_type) if isinstance(message_type, str) else None
+            if parser is not None:
+                return parser(data)
             
             return data
             
@@ -212,50 +325,63 @@ class DouyinIntegration:
         """Handle parsed message"""
         try:
             message_type = message.get("type")
-            
-            if message_type == "comment":
-                self.stats["comments_received"] += 1
-                if self.on_comment_callback:
-                    await self._safe_callback(
-                        self.on_comment_callback,
-                        message["user"],
-                        message["content"]
-                    )
-            
-            elif message_type == "gift":
-                self.stats["gifts_received"] += 1
-                if self.on_gift_callback:
-                    await self._safe_callback(
-                        self.on_gift_callback,
-                        message["user"],
-                        message["gift_name"],
-                        message["gift_count"]
-                    )
-            
-            elif message_type == "follow":
-                self.stats["new_followers"] += 1
-                if self.on_follow_callback:
-                    await self._safe_callback(
-                        self.on_follow_callback,
-                        message["user"]
-                    )
-            
-            elif message_type == "like":
-                self.stats["likes_received"] += message.get("count", 1)
-                if self.on_like_callback:
-                    await self._safe_callback(
-                        self.on_like_callback,
-                        message["user"],
-                        message.get("count", 1)
-                    )
+            handler = self._message_handlers.get(message_type) if isinstance(message_type, str) else None
+            if handler is not None:
+                await handler(message)
             
         except Exception as e:
             logger.error(f"Message handling error: {e}")
     
+    async def _handle_comment(self, message: Dict[str, Any]):
+        """Count a comment and forward it to the comment callback"""
+        self.stats["comments_received"] += 1
+        if self.on_comment_callback:
+            await self._safe_callback(
+                self.on_comment_callback,
+                message["user"],
+                message["content"]
+            )
+    
+    async def _handle_gift(self, message: Dict[str, Any]):
+        """Count a gift and forward it to the gift callback"""
+        self.stats["gifts_received"] += 1
+        if self.on_gift_callback:
+            await self._safe_callback(
+                self.on_gift_callback,
+                message["user"],
+                message["gift_name"],
+                message["gift_count"]
+            )
+    
+    async def _handle_follow(self, message: Dict[str, Any]):
+        """Count a follow and forward it to the follow callback"""
+        self.stats["new_followers"] += 1
+        if self.on_follow_callback:
+            await self._safe_callback(
+                self.on_follow_callback,
+                message["user"]
+            )
+    
+    async def _handle_like(self, message: Dict[str, Any]):
+        """Count likes and forward them to the like callback"""
+        count = message.get("count", 1)
+        self.stats["likes_received"] += count
+        if self.on_like_callback:
+            await self._safe_callback(
+                self.on_like_callback,
+                message["user"],
+                count
+            )
+    
     async def _safe_callback(self, callback: Callable, *args):
         """Safely execute callback"""
         try:
-            if asyncio.iscoroutinefunction(callback):
+            # Callbacks are set once, so remember whether each one is async
+            is_coroutine = self._coroutine_callbacks.get(callback)
+            if is_coroutine is None:
+                is_coroutine = self._coroutine_callbacks[callback] = asyncio.iscoroutinefunction(callback)
+            
+            if is_coroutine:
                 await callback(*args)
             else:
                 callback(*args)
@@ -263,10 +389,10 @@ class DouyinIntegration:
             logger.error(f"Callback execution error: {e}")
     
     async def _send_ping(self):
-        """Send ping to keep connection alive"""
+        """Send an application-level ping message"""
         try:
             if self.websocket:
-                ping_message = json.dumps({"type": "ping", "timestamp": time.time()})
+                ping_message = _PING_PREFIX + repr(_now()) + _PING_SUFFIX
                 await self.websocket.send(ping_message)
         except Exception as e:
             logger.error(f"Failed to send ping: {e}")
@@ -315,10 +441,10 @@ class DouyinIntegration:
             message_data = {
                 "type": "chat",
                 "content": message,
-                "timestamp": time.time()
+                "timestamp": _now()
             }
             
-            await self.websocket.send(json.dumps(message_data))
+            await self.websocket.send(_json_dumps(message_data))
             return True
             
         except Exception as e:
@@ -360,10 +486,34 @@ class DouyinIntegration:
 class DouyinStreamingBot:
     """High-level bot for Douyin streaming integration"""
     
+    # Comment keyword groups in priority order, matched against the lowercased text
+    _KEYWORD_GROUPS = (
+        ("greeting", ("你好", "hello", "hi")),
+        ("praise", ("漂亮", "可爱", "beautiful", "cute")),
+        ("sing", ("唱歌", "sing", "song")),
+        ("goodnight", ("晚安", "goodnight", "睡觉")),
+    )
+    
+    # Reply template for each keyword group, plus the default engagement reply
+    _RESPONSES = {
+        "greeting": "你好 {user}！欢迎来到直播间！",
+        "praise": "谢谢 {user} 的夸奖！你也很棒哦！",
+        "sing": "{user} 想听歌吗？我来为大家唱一首！",
+        "goodnight": "晚安 {user}！做个好梦！",
+        "default": "谢谢 {user} 的留言！",
+    }
+    
+    # Fallback when pyahocorasick is not installed: one alternation per group
+    _KEYWORD_PATTERNS = tuple(
+        (name, re.compile("|".join(map(re.escape, words))))
+        for name, words in _KEYWORD_GROUPS
+    )
+    
     def __init__(self, voice_callback: Optional[Callable] = None):
         self.douyin = DouyinIntegration()
         self.voice_callback = voice_callback
         self.auto_responses = True
+        self._keyword_automaton = self._build_keyword_automaton()
         
         # Set up callbacks
         self.douyin.set_comment_callback(self._handle_comment)
@@ -410,20 +560,41 @@ class DouyinStreamingBot:
     
     def _generate_response(self, user: str, content: str) -> Optional[str]:
         """Generate appropriate response to comment"""
-        content_lower = content.lower()
-        
-        # Simple response patterns
-        if any(word in content_lower for word in ["你好", "hello", "hi"]):
-            return f"你好 {user}！欢迎来到直播间！"
-        elif any(word in content_lower for word in ["漂亮", "可爱", "beautiful", "cute"]):
-            return f"谢谢 {user} 的夸奖！你也很棒哦！"
-        elif any(word in content_lower for word in ["唱歌", "sing", "song"]):
-            return f"{user} 想听歌吗？我来为大家唱一首！"
-        elif any(word in content_lower for word in ["晚安", "goodnight", "睡觉"]):
-            return f"晚安 {user}！做个好梦！"
+        group = self._match_keyword_group(content.lower())
         
         # Default response for engagement
-        if len(content) > 5:  # Only respond to substantial comments
-            return f"谢谢 {user} 的留言！"
+        if group is None:
+            if len(content) <= 5:  # Only respond to substantial comments
+                return None
+            group = "default"
+        
+        return self._RESPONSES[group].format(user=user)
+    
+    def _build_keyword_automaton(self):
+        """Build an Aho-Corasick automaton over all keyword groups, if available"""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for priority, (_, words) in enumerate(self._KEYWORD_GROUPS):
+            for word in words:
+                automaton.add_word(word, min(priority, automaton.get(word, priority)))
+        automaton.make_automaton()
+        return automaton
+    
+    def _match_keyword_group(self, content_lower: str) -> Optional[str]:
+        """Name of the highest-priority keyword group present in the text"""
+        if self._keyword_automaton is not None:
+            # One pass over the text finds every keyword of every group
+            best = None
+            for _, priority in self._keyword_automaton.iter(content_lower):
+                if best is None or priority < best:
+                    best = priority
+                    if best == 0:
+                        break
+            return self._KEYWORD_GROUPS[best][0] if best is not None else None
         
+        for name, pattern in self._KEYWORD_PATTERNS:
+            if pattern.search(content_lower):
+                return name
         return None
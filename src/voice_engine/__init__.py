@@ -1,6 +1,26 @@
-from .voice_manager import VoiceManager
-from .xtts_engine import XTTSEngine
-from .chattts_engine import ChatTTSEngine
-from .realtime_tts import RealtimeTTSEngine
+import importlib
+
+# The engines pull in torch and the TTS backends, so each export is imported
+# on first access instead of with the package
+_EXPORTS = {
+    "VoiceManager": ".voice_manager",
+    "XTTSEngine": ".xtts_engine",
+    "ChatTTSEngine": ".chattts_engine",
+    "RealtimeTTSEngine": ".realtime_tts",
+}
 
 __all__ = ["VoiceManager", "XTTSEngine", "ChatTTSEngine", "RealtimeTTSEngine"]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
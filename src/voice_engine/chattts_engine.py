@@ -3,9 +3,16 @@ ChatTTS Engine - Optimized for Chinese/English conversational speech
 """
 import torch
 import numpy as np
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Tuple
 import logging
 import os
+import contextlib
+import re
+import inspect
+import queue
+import threading
+from fractions import Fraction
+from functools import lru_cache
 
 try:
     import ChatTTS
@@ -13,10 +20,144 @@ except ImportError:
     ChatTTS = None
     print("Warning: ChatTTS not installed. Install with: pip install ChatTTS")
 
+try:
+    import torchaudio
+except ImportError:
+    torchaudio = None
+    print("Warning: torchaudio not installed. Install with: pip install torchaudio")
+
+try:
+    from safetensors import safe_open
+    from safetensors.torch import save_file as save_safetensors
+except ImportError:
+    safe_open = None
+    save_safetensors = None
+    print("Warning: safetensors not installed. Install with: pip install safetensors")
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+    print("Warning: SciPy not installed. Install with: pip install scipy")
+
 from ..config import settings, VoiceProfile
 
 logger = logging.getLogger(__name__)
 
+# Text length buckets synthesized once after a compiled load, so graph capture
+# and autotuning happen at startup instead of on the first live requests
+_LENGTH_BUCKETS = (64, 128, 256, 512)
+_WARMUP_TEXT = "你好，欢迎来到直播间！今天我们一起聊天吧。"
+
+# ChatTTS submodules worth compiling when its own compile option is unavailable.
+# The GPT decode loop grows its KV cache with torch.cat inside ChatTTS, so each
+# step still has new shapes; a static KV buffer (or padding tokens to a bucket)
+# would need changes in ChatTTS itself. Compiling with automatic dynamic shapes
+# instead lets the sequence dimension go symbolic after the first length change
+# rather than recompiling for every new length.
+_COMPILE_SUBMODULES = ("gpt", "decoder", "dvae", "vocos")
+
+_HALF_PRECISIONS = {"bfloat16": torch.bfloat16, "float16": torch.float16}
+
+# synthesize() kwargs forwarded to ChatTTS's infer-code parameters. The EOS
+# check runs inside ChatTTS's decode loop; min_new_token masks EOS for the
+# first N tokens and max_new_token bounds the loop for long inputs.
+_INFER_CODE_OPTIONS = ("min_new_token", "max_new_token")
+
+
+# Sampling temperature used for each voice profile emotion
+_EMOTION_TEMPERATURES = {
+    "excited": 0.8,
+    "happy": 0.6,
+    "calm": 0.3,
+    "sad": 0.2,
+    "angry": 0.7
+}
+
+_CN_CHAR_RE = re.compile(r'[\u4e00-\u9fff]')
+_LETTER_RE = re.compile(r'[a-zA-Z]')
+
+
+# Pause tokens appended after sentence punctuation, applied in one translate pass
+_CHINESE_BREAKS = str.maketrans({
+    '，': '，[break_2]',
+    '。': '。[break_4]',
+    '！': '！[break_3]',
+    '？': '？[break_3]',
+})
+_ENGLISH_BREAKS = str.maketrans({
+    ',': ',[break_2]',
+    '.': '.[break_4]',
+    '!': '![break_3]',
+    '?': '?[break_3]',
+})
+
+
+def _count_cn_en(text: str) -> Tuple[int, int]:
+    """Count Chinese characters and ASCII letters in text"""
+    return len(_CN_CHAR_RE.findall(text)), len(_LETTER_RE.findall(text))
+
+
+@lru_cache(maxsize=256)
+def _prepare_text(text: str, language: str) -> str:
+    """Add ChatTTS pause and control tokens to text"""
+    processed_text = text.strip()
+    
+    # Add language-specific markers if needed
+    chinese_chars, english_chars = _count_cn_en(text)
+    total_chars = chinese_chars + english_chars
+    if language in ("zh", "zh-cn") or (total_chars > 0 and chinese_chars / total_chars > 0.5):
+        # Add pauses for better rhythm
+        processed_text = processed_text.translate(_CHINESE_BREAKS)
+    elif language in ("en", "en-us") or (total_chars > 0 and english_chars / total_chars > 0.5):
+        processed_text = processed_text.translate(_ENGLISH_BREAKS)
+    
+    # Add ChatTTS control tokens for better quality
+    return f"[oral_2][laugh_0][break_4]{processed_text}"
+
+
+@lru_cache(maxsize=64)
+def _resample_ratio(factor: float) -> tuple:
+    """Rational (up, down) approximation of 1 / factor"""
+    ratio = Fraction(1.0 / factor).limit_denominator(100)
+    return ratio.numerator, ratio.denominator
+
+
+def _stretch_audio(audio: Union[torch.Tensor, np.ndarray], factor: float) -> Union[torch.Tensor, np.ndarray]:
+    """Resample audio to len(audio) / factor samples"""
+    if isinstance(audio, torch.Tensor):
+        if torchaudio is not None:
+            # Stay on the tensor's device (GPU) instead of resampling on the host
+            up, down = _resample_ratio(factor)
+            return torchaudio.functional.resample(audio, down, up)
+        audio = audio.cpu().numpy()
+    
+    if resample_poly is None:
+        target_length = int(len(audio) / factor)
+        return np.interp(
+            np.linspace(0, len(audio), target_length),
+            np.arange(len(audio)),
+            audio
+        )
+    
+    # Polyphase FIR resampling: anti-aliased and vectorized in C
+    up, down = _resample_ratio(factor)
+    return resample_poly(audio, up, down)
+
+
+def _to_numpy(audio: Union[torch.Tensor, np.ndarray]) -> np.ndarray:
+    """Copy a tensor to a host numpy array; arrays pass through"""
+    if isinstance(audio, torch.Tensor):
+        if audio.is_cuda:
+            # Pinned host memory (served from PyTorch's caching host allocator)
+            # takes a direct DMA copy instead of staging through pageable memory
+            host = torch.empty(audio.shape, dtype=audio.dtype, pin_memory=True)
+            host.copy_(audio, non_blocking=True)
+            torch.cuda.current_stream(audio.device).synchronize()
+            return host.numpy()
+        return audio.cpu().numpy()
+    return audio
+
 
 class ChatTTSEngine:
     """ChatTTS Text-to-Speech Engine optimized for conversation"""
@@ -26,10 +167,20 @@ class ChatTTSEngine:
         self.device = "cuda" if torch.cuda.is_available() and settings.use_gpu else "cpu"
         self.sample_rate = 24000  # ChatTTS default sample rate
         self.is_loaded = False
+        self.inference_dtype = None  # Autocast dtype when the GPT runs in half precision
+        self.supports_stream = False  # ChatTTS infer() can yield audio while decoding
+        
+        # One inference at a time: the model and its compiled graphs are shared
+        # by the batch path and the streaming producer threads
+        self._infer_lock = threading.Lock()
+        
+        # Reuse Inductor kernels across restarts when compiling
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(settings.cache_dir, "torchinductor"))
         
         # ChatTTS specific settings
         self.spk_stat = None  # Speaker statistics
         self.spk_emb = None   # Speaker embedding
+        self.speaker_cache_dir = os.path.join(settings.cache_dir, "chattts_speakers")
         
         # Supported languages
         self.supported_languages = ["zh", "en", "zh-cn", "en-us"]
@@ -41,6 +192,9 @@ class ChatTTSEngine:
             "male_young": {"spk_emb": None, "temperature": 0.4},
             "male_mature": {"spk_emb": None, "temperature": 0.6}
         }
+        
+        # Speaker settings keyed by (preset, emotion); cleared whenever presets change
+        self._speaker_settings = lru_cache(maxsize=256)(self._build_speaker_settings)
     
     def load_model(self) -> bool:
         """Load ChatTTS model"""
@@ -54,20 +208,37 @@ class ChatTTSEngine:
             # Initialize ChatTTS
             self.model = ChatTTS.Chat()
             
-            # Load model with appropriate settings
-            success = self.model.load_models(
-                compile=False,  # Set to True for better performance if supported
-                device=self.device
-            )
+            # Load model with appropriate settings; compiling only pays off on GPU
+            use_compile = settings.enable_compile and self.device == "cuda"
+            success = False
+            if use_compile:
+                try:
+                    success = self.model.load_models(compile=True, device=self.device)
+                except Exception as e:
+                    logger.warning(f"Compiled ChatTTS load failed, falling back to eager mode: {e}")
+            
+            if not success:
+                success = self.model.load_models(compile=False, device=self.device)
+                # Compile the decoder stack ourselves instead
+                if success and use_compile:
+                    use_compile = self._compile_submodules()
             
             if not success:
                 logger.error("Failed to load ChatTTS models")
                 return False
             
+            self._apply_precision()
+            
+            self.supports_stream = "stream" in inspect.signature(self.model.infer).parameters
+            
             # Load speaker statistics
             self._load_speaker_presets()
             
             self.is_loaded = True
+            
+            if use_compile:
+                self._warmup()
+            
             logger.info("ChatTTS model loaded successfully")
             return True
             
@@ -75,6 +246,69 @@ class ChatTTSEngine:
             logger.error(f"Failed to load ChatTTS model: {e}")
             return False
     
+    def _get_submodule(self, name: str) -> Optional[torch.nn.Module]:
+        """Find a ChatTTS submodule by name"""
+        # Newer ChatTTS exposes submodules as attributes, older ones in pretrain_models
+        module = getattr(self.model, name, None)
+        if module is None:
+            module = (getattr(self.model, "pretrain_models", None) or {}).get(name)
+        return module if isinstance(module, torch.nn.Module) else None
+    
+    def _apply_precision(self):
+        """Lower the GPT decoder's precision according to settings.model_precision"""
+        precision = settings.model_precision
+        gpt = self._get_submodule("gpt")
+        if gpt is None or precision == "float32":
+            return
+        
+        try:
+            if precision in _HALF_PRECISIONS and self.device == "cuda":
+                # Halves weight bandwidth in the memory-bound decode loop;
+                # synthesize runs inference under autocast to match
+                self.inference_dtype = _HALF_PRECISIONS[precision]
+                gpt.to(self.inference_dtype)
+            elif precision == "int8" and self.device == "cpu":
+                # Weight-only dynamic quantization of the Linear layers
+                torch.ao.quantization.quantize_dynamic(
+                    gpt, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+            else:
+                logger.warning(f"Model precision {precision} not supported on {self.device}, using float32")
+                return
+            
+            logger.info(f"ChatTTS GPT running in {precision}")
+            
+        except Exception as e:
+            self.inference_dtype = None
+            logger.error(f"Failed to apply model precision {precision}: {e}")
+    
+    def _compile_submodules(self) -> bool:
+        """Compile ChatTTS submodules in place with CUDA graphs (reduce-overhead)"""
+        compiled = []
+        for name in _COMPILE_SUBMODULES:
+            module = self._get_submodule(name)
+            if module is None or not hasattr(module, "compile"):
+                continue
+            try:
+                # fullgraph=False tolerates graph breaks from ChatTTS's Python control flow
+                module.compile(mode="reduce-overhead", fullgraph=False, dynamic=None)
+                compiled.append(name)
+            except Exception as e:
+                logger.warning(f"Failed to compile ChatTTS {name}: {e}")
+        
+        if compiled:
+            logger.info(f"Compiled ChatTTS submodules: {', '.join(compiled)}")
+        return bool(compiled)
+    
+    def _warmup(self):
+        """Run a few throwaway syntheses to trigger compilation up front"""
+        logger.info("Warming up compiled ChatTTS model...")
+        for length in _LENGTH_BUCKETS:
+            text = (_WARMUP_TEXT * (length // len(_WARMUP_TEXT) + 1))[:length]
+            if self.synthesize(text, language="zh") is None:
+                logger.warning(f"ChatTTS warmup failed for {length} chars")
+                break
+    
     def _load_speaker_presets(self):
         """Load speaker presets and embeddings"""
         try:
@@ -90,13 +324,32 @@ class ChatTTSEngine:
             for preset_name in self.voice_presets.keys():
                 # This is a placeholder - in real implementation,
                 # you would load actual speaker embeddings
-                self.voice_presets[preset_name]["spk_emb"] = self.model.sample_random_speaker()
+                self.voice_presets[preset_name]["spk_emb"] = self._load_speaker_embedding(preset_name)
             
+            self._speaker_settings.cache_clear()
             logger.info("Speaker presets loaded")
             
         except Exception as e:
             logger.error(f"Failed to load speaker presets: {e}")
     
+    def _load_speaker_embedding(self, preset_name: str) -> Any:
+        """Load a cached speaker embedding, sampling and caching it on first use"""
+        cache_path = os.path.join(self.speaker_cache_dir, f"{preset_name}.pt")
+        
+        if os.path.exists(cache_path):
+            try:
+                return torch.load(cache_path, map_location=self.device)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable speaker cache {cache_path}: {e}")
+        
+        spk_emb = self.model.sample_random_speaker()
+        try:
+            os.makedirs(self.speaker_cache_dir, exist_ok=True)
+            torch.save(spk_emb, cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to cache speaker embedding {preset_name}: {e}")
+        return spk_emb
+    
     def synthesize(
         self,
         text: str,
@@ -113,58 +366,69 @@ class ChatTTSEngine:
             language: Language code
             speaker_preset: Speaker preset name
             voice_profile: Voice profile configuration
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (min_new_token / max_new_token are passed to ChatTTS)
         
         Returns:
             Audio array or None if failed
         """
+        results = self.synthesize_batch([text], language, speaker_preset, voice_profile, **kwargs)
+        return results[0] if results else None
+    
+    def synthesize_batch(
+        self,
+        texts: List[str],
+        language: str = "auto",
+        speaker_preset: str = "female_young",
+        voice_profile: Optional[VoiceProfile] = None,
+        **kwargs
+    ) -> Optional[List[np.ndarray]]:
+        """
+        Synthesize several texts in a single ChatTTS inference call
+        
+        All texts share the speaker preset and voice profile, so the
+        autoregressive decode runs once over the whole batch.
+        
+        Args:
+            texts: Texts to synthesize
+            language: Language code
+            speaker_preset: Speaker preset name
+            voice_profile: Voice profile configuration
+            **kwargs: Additional parameters (min_new_token / max_new_token are passed to ChatTTS)
+        
+        Returns:
+            List of audio arrays (one per text) or None if failed
+        """
         try:
+            if not texts:
+                return []
+            
             if not self.is_loaded:
                 if not self.load_model():
                     return None
             
             # Prepare text
-            processed_text = self._prepare_text(text, language)
+            processed_texts = [self._prepare_text(text, language) for text in texts]
             
-            # Get speaker settings
-            speaker_settings = self._get_speaker_settings(speaker_preset, voice_profile)
-            
-            # Prepare inference parameters
-            params_infer_code = {
-                'spk_emb': speaker_settings.get('spk_emb'),
-                'temperature': speaker_settings.get('temperature', 0.3),
-                'top_P': 0.7,
-                'top_K': 20,
-            }
-            
-            params_refine_text = {
-                'prompt': '[oral_2][laugh_0][break_6]'
-            }
-            
-            # Apply voice profile adjustments
-            if voice_profile:
-                params_infer_code.update(self._apply_voice_profile(voice_profile))
+            params_refine_text, params_infer_code = self._build_infer_params(speaker_preset, voice_profile, kwargs)
             
             # Synthesize
-            logger.debug(f"Synthesizing with ChatTTS: {processed_text[:50]}...")
-            
-            wavs = self.model.infer(
-                [processed_text],
-                params_refine_text=params_refine_text,
-                params_infer_code=params_infer_code,
-                use_decoder=True
-            )
+            logger.debug(f"Synthesizing {len(processed_texts)} text(s) with ChatTTS: {processed_texts[0][:50]}...")
+            
+            with self._infer_lock, self._inference_context():
+                wavs = self.model.infer(
+                    processed_texts,
+                    params_refine_text=params_refine_text,
+                    params_infer_code=params_infer_code,
+                    use_decoder=True
+                )
             
             if wavs and len(wavs) > 0:
-                # Convert to numpy array
-                audio = wavs[0]
-                if isinstance(audio, torch.Tensor):
-                    audio = audio.cpu().numpy()
-                
-                # Apply post-processing
-                audio = self._post_process_audio(audio, voice_profile)
+                results = []
+                for audio in wavs:
+                    # Apply post-processing (also converts tensors to numpy)
+                    results.append(self._post_process_audio(audio, voice_profile))
                 
-                return audio
+                return results
             else:
                 logger.error("ChatTTS synthesis returned empty result")
                 return None
@@ -173,157 +437,214 @@ class ChatTTSEngine:
             logger.error(f"ChatTTS synthesis failed: {e}")
             return None
     
+    def _inference_context(self) -> contextlib.ExitStack:
+        """No autograd bookkeeping; autocast when the GPT runs in half precision"""
+        ctx = contextlib.ExitStack()
+        ctx.enter_context(torch.inference_mode())
+        if self.inference_dtype is not None:
+            ctx.enter_context(torch.autocast("cuda", dtype=self.inference_dtype))
+        return ctx
+    
+    def _build_infer_params(
+        self,
+        speaker_preset: str,
+        voice_profile: Optional[VoiceProfile],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[Dict, Dict]:
+        """Build ChatTTS refine-text and infer-code parameters"""
+        # Get speaker settings
+        speaker_settings = self._get_speaker_settings(speaker_preset, voice_profile)
+        
+        # Prepare inference parameters
+        params_infer_code = {
+            'spk_emb': speaker_settings.get('spk_emb'),
+            'temperature': speaker_settings.get('temperature', 0.3),
+            'top_P': 0.7,
+            'top_K': 20,
+        }
+        
+        params_refine_text = {
+            'prompt': '[oral_2][laugh_0][break_6]'
+        }
+        
+        for option in _INFER_CODE_OPTIONS:
+            if option in kwargs:
+                params_infer_code[option] = kwargs[option]
+        
+        # Apply voice profile adjustments
+        if voice_profile:
+            adjustments = self._apply_voice_profile(voice_profile)
+            if adjustments:
+                params_infer_code.update(adjustments)
+        
+        return params_refine_text, params_infer_code
+    
     def synthesize_streaming(
         self,
         text: str,
         language: str = "auto",
         speaker_preset: str = "female_young",
         voice_profile: Optional[VoiceProfile] = None,
-        chunk_size: int = 1024
+        chunk_size: int = 1024,
+        **kwargs
     ):
         """
         Streaming synthesis (generator)
-        Note: ChatTTS doesn't natively support streaming, so we chunk the output
+        Yields audio while ChatTTS is still decoding when its infer() supports
+        stream=True; otherwise the full waveform is synthesized and chunked.
         """
         try:
-            # Synthesize full audio first
-            audio = self.synthesize(text, language, speaker_preset, voice_profile)
+            if not self.is_loaded:
+                if not self.load_model():
+                    yield None
+                    return
             
-            if audio is not None:
-                # Yield audio in chunks
-                for i in range(0, len(audio), chunk_size):
-                    yield audio[i:i + chunk_size]
-            else:
+            if not self.supports_stream:
+                # Synthesize full audio first
+                audio = self.synthesize(text, language, speaker_preset, voice_profile, **kwargs)
+                
+                if audio is not None:
+                    # Yield audio in chunks
+                    for i in range(0, len(audio), chunk_size):
+                        yield audio[i:i + chunk_size]
+                else:
+                    yield None
+                return
+            
+            processed_text = self._prepare_text(text, language)
+            params_refine_text, params_infer_code = self._build_infer_params(speaker_preset, voice_profile, kwargs)
+            
+            # Decode on a producer thread so the GPU keeps generating while
+            # the caller plays back earlier pieces
+            pieces = queue.SimpleQueue()
+            stop = threading.Event()
+            producer = threading.Thread(
+                target=self._stream_producer,
+                args=(processed_text, params_refine_text, params_infer_code, pieces, stop),
+                daemon=True
+            )
+            producer.start()
+            
+            # Resampling each piece on its own clicks at every boundary, so
+            # speed / pitch changes are applied once over the whole text (a
+            # single sentence when VoiceManager pipelines it)
+            adjust = voice_profile is not None and (voice_profile.speed != 1.0 or voice_profile.pitch != 1.0)
+            adjusted_pieces = []
+            produced = False
+            try:
+                while True:
+                    piece = pieces.get()
+                    if piece is None:
+                        break
+                    
+                    if adjust:
+                        adjusted_pieces.append(_to_numpy(piece))
+                        continue
+                    
+                    audio = _to_numpy(piece)
+                    for i in range(0, len(audio), chunk_size):
+                        produced = True
+                        yield audio[i:i + chunk_size]
+                
+                if adjusted_pieces:
+                    audio = self._post_process_audio(np.concatenate(adjusted_pieces), voice_profile)
+                    for i in range(0, len(audio), chunk_size):
+                        produced = True
+                        yield audio[i:i + chunk_size]
+            finally:
+                # Consumer done or gone: stop decoding before the next request
+                # gets the model
+                stop.set()
+                producer.join()
+            
+            if not produced:
                 yield None
                 
         except Exception as e:
             logger.error(f"ChatTTS streaming synthesis failed: {e}")
             yield None
     
+    def _stream_producer(
+        self,
+        processed_text: str,
+        params_refine_text: Dict,
+        params_infer_code: Dict,
+        pieces: queue.SimpleQueue,
+        stop: threading.Event
+    ):
+        """Run a streaming ChatTTS inference and push each waveform piece to the queue until stopped"""
+        try:
+            with self._infer_lock, self._inference_context():
+                stream = self.model.infer(
+                    [processed_text],
+                    params_refine_text=params_refine_text,
+                    params_infer_code=params_infer_code,
+                    use_decoder=True,
+                    stream=True
+                )
+                try:
+                    for wavs in stream:
+                        if stop.is_set():
+                            break
+                        if wavs is not None and len(wavs) > 0 and wavs[0] is not None and len(wavs[0]) > 0:
+                            pieces.put(wavs[0])
+                finally:
+                    stream.close()
+                        
+        except Exception as e:
+            logger.error(f"ChatTTS streaming inference failed: {e}")
+        finally:
+            pieces.put(None)
+    
     def _prepare_text(self, text: str, language: str) -> str:
         """Prepare text for ChatTTS synthesis"""
         try:
-            # ChatTTS specific text preprocessing
-            processed_text = text.strip()
-            
-            # Add language-specific markers if needed
-            if language in ["zh", "zh-cn"] or self._is_chinese(text):
-                # Chinese text processing
-                processed_text = self._process_chinese_text(processed_text)
-            elif language in ["en", "en-us"] or self._is_english(text):
-                # English text processing
-                processed_text = self._process_english_text(processed_text)
-            
-            # Add ChatTTS control tokens for better quality
-            processed_text = f"[oral_2][laugh_0][break_4]{processed_text}"
-            
-            return processed_text
-            
+            return _prepare_text(text, language)
         except Exception as e:
             logger.error(f"Text preparation failed: {e}")
             return text
     
-    def _process_chinese_text(self, text: str) -> str:
-        """Process Chinese text for ChatTTS"""
-        # Add pauses for better rhythm
-        text = text.replace('，', '，[break_2]')
-        text = text.replace('。', '。[break_4]')
-        text = text.replace('！', '！[break_3]')
-        text = text.replace('？', '？[break_3]')
-        return text
-    
-    def _process_english_text(self, text: str) -> str:
-        """Process English text for ChatTTS"""
-        # Add pauses for better rhythm
-        text = text.replace(',', ',[break_2]')
-        text = text.replace('.', '.[break_4]')
-        text = text.replace('!', '![break_3]')
-        text = text.replace('?', '?[break_3]')
-        return text
-    
-    def _is_chinese(self, text: str) -> bool:
-        """Check if text contains Chinese characters"""
-        import re
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        total_chars = len(re.findall(r'[a-zA-Z\u4e00-\u9fff]', text))
-        return total_chars > 0 and chinese_chars / total_chars > 0.5
-    
-    def _is_english(self, text: str) -> bool:
-        """Check if text contains English characters"""
-        import re
-        english_chars = len(re.findall(r'[a-zA-Z]', text))
-        total_chars = len(re.findall(r'[a-zA-Z\u4e00-\u9fff]', text))
-        return total_chars > 0 and english_chars / total_chars > 0.5
-    
     def _get_speaker_settings(self, preset: str, voice_profile: Optional[VoiceProfile]) -> Dict:
-        """Get speaker settings for synthesis"""
+        """Get speaker settings for synthesis (shared cached dict, do not mutate)"""
+        return self._speaker_settings(preset, voice_profile.emotion if voice_profile else None)
+    
+    def _build_speaker_settings(self, preset: str, emotion: Optional[str]) -> Dict:
+        """Build speaker settings for a preset, adjusting temperature by emotion"""
         settings = self.voice_presets.get(preset, self.voice_presets["female_young"]).copy()
         
-        # Apply voice profile modifications
-        if voice_profile:
-            # Adjust temperature based on emotion
-            emotion_temp_map = {
-                "excited": 0.8,
-                "happy": 0.6,
-                "calm": 0.3,
-                "sad": 0.2,
-                "angry": 0.7
-            }
-            
-            if voice_profile.emotion in emotion_temp_map:
-                settings["temperature"] = emotion_temp_map[voice_profile.emotion]
+        if emotion in _EMOTION_TEMPERATURES:
+            settings["temperature"] = _EMOTION_TEMPERATURES[emotion]
         
         return settings
     
-    def _apply_voice_profile(self, voice_profile: VoiceProfile) -> Dict:
-        """Apply voice profile settings to inference parameters"""
-        adjustments = {}
-        
-        # Map voice profile to ChatTTS parameters
-        if voice_profile.speed != 1.0:
-            # ChatTTS doesn't directly support speed adjustment
-            # This would need post-processing
-            pass
-        
-        if voice_profile.pitch != 1.0:
-            # ChatTTS doesn't directly support pitch adjustment
-            # This would need post-processing
-            pass
-        
-        return adjustments
+    def _apply_voice_profile(self, voice_profile: VoiceProfile) -> Optional[Dict]:
+        """Map voice profile settings to inference parameters, None if nothing maps"""
+        # ChatTTS has no inference parameters for speed or pitch; both are
+        # applied in _post_process_audio instead
+        return None
     
-    def _post_process_audio(self, audio: np.ndarray, voice_profile: Optional[VoiceProfile]) -> np.ndarray:
-        """Post-process audio based on voice profile"""
+    def _post_process_audio(self, audio: Union[torch.Tensor, np.ndarray], voice_profile: Optional[VoiceProfile]) -> np.ndarray:
+        """Post-process audio based on voice profile, copying tensors to the host last"""
         try:
-            if not voice_profile:
-                return audio
+            if not voice_profile or (voice_profile.speed == 1.0 and voice_profile.pitch == 1.0):
+                return _to_numpy(audio)
             
             # Apply speed adjustment
             if voice_profile.speed != 1.0:
                 # Simple speed adjustment by resampling
-                target_length = int(len(audio) / voice_profile.speed)
-                audio = np.interp(
-                    np.linspace(0, len(audio), target_length),
-                    np.arange(len(audio)),
-                    audio
-                )
+                audio = _stretch_audio(audio, voice_profile.speed)
             
             # Apply pitch adjustment (basic implementation)
             if voice_profile.pitch != 1.0:
                 # This is a very basic pitch shift
                 # For better quality, use librosa.effects.pitch_shift
-                target_length = int(len(audio) / voice_profile.pitch)
-                audio = np.interp(
-                    np.linspace(0, len(audio), target_length),
-                    np.arange(len(audio)),
-                    audio
-                )
+                audio = _stretch_audio(audio, voice_profile.pitch)
             
-            return audio
+            return _to_numpy(audio)
             
         except Exception as e:
             logger.error(f"Audio post-processing failed: {e}")
-            return audio
+            return _to_numpy(audio)
     
     def get_available_speakers(self) -> List[str]:
         """Get list of available speaker presets"""
@@ -336,6 +657,7 @@ class ChatTTSEngine:
                 "spk_emb": spk_emb,
                 "temperature": temperature
             }
+            self._speaker_settings.cache_clear()
             logger.info(f"Added speaker preset: {name}")
             return True
         except Exception as e:
@@ -350,7 +672,16 @@ class ChatTTSEngine:
                 return False
             
             preset = self.voice_presets[name]
-            torch.save(preset, file_path)
+            if file_path.endswith(".safetensors"):
+                if save_safetensors is None or not isinstance(preset.get("spk_emb"), torch.Tensor):
+                    logger.error("safetensors presets need the safetensors package and a tensor speaker embedding")
+                    return False
+                save_safetensors({
+                    "spk_emb": preset["spk_emb"].detach().contiguous().cpu(),
+                    "temperature": torch.tensor(preset.get("temperature", 0.3))
+                }, file_path)
+            else:
+                torch.save(preset, file_path)
             logger.info(f"Speaker preset saved: {file_path}")
             return True
             
@@ -365,8 +696,20 @@ class ChatTTSEngine:
                 logger.error(f"Preset file not found: {file_path}")
                 return False
             
-            preset = torch.load(file_path, map_location=self.device)
+            if file_path.endswith(".safetensors"):
+                if safe_open is None:
+                    logger.error("safetensors not available")
+                    return False
+                # Memory-mapped tensors, no unpickling
+                with safe_open(file_path, framework="pt", device=self.device) as f:
+                    preset = {
+                        "spk_emb": f.get_tensor("spk_emb"),
+                        "temperature": f.get_tensor("temperature").item()
+                    }
+            else:
+                preset = torch.load(file_path, map_location=self.device)
             self.voice_presets[name] = preset
+            self._speaker_settings.cache_clear()
             logger.info(f"Speaker preset loaded: {name}")
             return True
             
@@ -374,13 +717,20 @@ class ChatTTSEngine:
             logger.error(f"Failed to load speaker preset: {e}")
             return False
     
-    def cleanup(self):
-        """Cleanup resources"""
+    def cleanup(self, release_memory: bool = False):
+        """
+        Cleanup resources
+        
+        Args:
+            release_memory: Return cached CUDA blocks to the driver. Leave off when
+                this engine is reloaded in the same process (the caching allocator
+                reuses them); pass True before loading a different engine.
+        """
         if self.model:
             del self.model
             self.model = None
         
-        if torch.cuda.is_available():
+        if release_memory and torch.cuda.is_available():
             torch.cuda.empty_cache()
         
         self.is_loaded = False
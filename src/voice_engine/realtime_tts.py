@@ -2,8 +2,8 @@
 RealtimeTTS Engine wrapper for streaming text-to-speech
 """
 import asyncio
-import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from typing import Optional, Generator, Dict, Any
 import logging
@@ -29,8 +29,18 @@ class RealtimeTTSEngine:
         self.stream = None
         self.engine = None
         self.is_initialized = False
-        self.audio_queue = queue.Queue()
+        self.audio_queue = queue.SimpleQueue()
         self.is_streaming = False
+        self._waiting_consumers = 0
+        
+        # Long-lived synthesis worker, created on first synthesize_async call,
+        # and its not yet finished jobs (cancelled on cleanup)
+        self._executor = None
+        self._pending = set()
+        
+        # Scratch buffers reused for float -> int16 chunk conversion
+        self._float_scratch = np.empty(0, dtype=np.float32)
+        self._pcm_scratch = np.empty(0, dtype=np.int16)
         
     def initialize(self) -> bool:
         """Initialize RealtimeTTS engine"""
@@ -100,7 +110,7 @@ class RealtimeTTSEngine:
                 
                 # Convert to bytes if needed
                 if isinstance(audio_chunk, np.ndarray):
-                    audio_chunk = (audio_chunk * 32767).astype(np.int16).tobytes()
+                    audio_chunk = self._to_pcm16_bytes(audio_chunk)
                 
                 yield audio_chunk
             
@@ -112,6 +122,24 @@ class RealtimeTTSEngine:
         finally:
             self.is_streaming = False
     
+    def _to_pcm16_bytes(self, audio_chunk: np.ndarray) -> bytes:
+        """Scale a float chunk to int16 PCM bytes without per-chunk temporaries"""
+        if audio_chunk.dtype.kind != 'f':
+            return (audio_chunk * 32767).astype(np.int16).tobytes()
+        
+        samples = np.ravel(audio_chunk)
+        size = samples.size
+        if size > self._pcm_scratch.size or samples.dtype != self._float_scratch.dtype:
+            capacity = max(size, self._pcm_scratch.size)
+            self._float_scratch = np.empty(capacity, dtype=samples.dtype)
+            self._pcm_scratch = np.empty(capacity, dtype=np.int16)
+        
+        scaled = self._float_scratch[:size]
+        pcm = self._pcm_scratch[:size]
+        np.multiply(samples, 32767, out=scaled)
+        np.copyto(pcm, scaled, casting='unsafe')
+        return pcm.tobytes()
+    
     def synthesize_async(
         self,
         text: str,
@@ -127,6 +155,9 @@ class RealtimeTTSEngine:
             voice_profile: Voice configuration
             language: Language code
             callback: Function to call with audio chunks
+            
+        Returns:
+            Future that completes when synthesis finishes
         """
         def synthesis_worker():
             try:
@@ -149,24 +180,30 @@ class RealtimeTTSEngine:
                 else:
                     self.audio_queue.put(None)
         
-        # Start synthesis in background thread
-        thread = threading.Thread(target=synthesis_worker)
-        thread.daemon = True
-        thread.start()
+        # Run on the persistent worker so thread-local engine state stays warm
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="realtime-tts")
+        future = self._executor.submit(synthesis_worker)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
     
     def get_audio_chunks(self) -> Generator[bytes, None, None]:
         """Get audio chunks from queue"""
-        while True:
-            try:
-                chunk = self.audio_queue.get(timeout=1.0)
-                if chunk is None:  # End of stream signal
+        # Blocks until the next chunk; the producer always finishes with None
+        self._waiting_consumers += 1
+        try:
+            while True:
+                try:
+                    chunk = self.audio_queue.get()
+                    if chunk is None:  # End of stream signal
+                        break
+                    yield chunk
+                except Exception as e:
+                    logger.error(f"Error getting audio chunks: {e}")
                     break
-                yield chunk
-            except queue.Empty:
-                continue
-            except Exception as e:
-                logger.error(f"Error getting audio chunks: {e}")
-                break
+        finally:
+            self._waiting_consumers -= 1
     
     def _apply_voice_settings(self, voice_profile: VoiceProfile):
         """Apply voice profile settings to the engine"""
@@ -250,6 +287,13 @@ class RealtimeTTSEngine:
         """Cleanup resources"""
         self.stop_streaming()
         
+        if self._executor:
+            # shutdown(cancel_futures=True) needs Python 3.9; cancel queued jobs directly
+            for future in list(self._pending):
+                future.cancel()
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
         if self.stream:
             try:
                 self.stream.stop()
@@ -267,9 +311,11 @@ class RealtimeTTSEngine:
         
         self.is_initialized = False
         
-        # Clear audio queue
+        # Clear audio queue and release any consumer still waiting on it
         while not self.audio_queue.empty():
             try:
                 self.audio_queue.get_nowait()
             except queue.Empty:
                 break
+        for _ in range(self._waiting_consumers):
+            self.audio_queue.put(None)
@@ -3,10 +3,20 @@ Voice Manager - Orchestrates multiple TTS engines and voice profiles
 """
 import asyncio
 import logging
-from typing import Optional, Dict, Any, Generator, Union
+import queue
+import re
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, AsyncGenerator, Generator, Iterable, Union
 import numpy as np
 from enum import Enum
 
+# Optional: google-re2 gives linear-time sentence splitting on arbitrary input
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 from .xtts_engine import XTTSEngine
 from .chattts_engine import ChatTTSEngine
 from .realtime_tts import RealtimeTTSEngine
@@ -14,6 +24,77 @@ from ..config import settings, VoiceProfile, VoiceEngine
 
 logger = logging.getLogger(__name__)
 
+# Runs of sentence terminators; see _is_sentence_end for when a bare "." counts
+_TERMINATOR_RE = (re2 or re).compile(r'[.?!。？！]+')
+_WORD_BEFORE_RE = re.compile(r'([\w.]+)$')
+_ABBREVIATIONS = frozenset(("mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e"))
+
+_CLAUSE_BREAK_RE = re.compile(r'[,，]')
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_MIN_CLAUSE_WORDS = 4
+_CJK_CHARS_PER_WORD = 2
+
+# Concurrent synthesize_async requests collected into one engine call
+_MICRO_BATCH_SIZE = 8
+_MICRO_BATCH_WINDOW = 0.01  # seconds
+
+# Audio chunks synthesized ahead of the consumer when pipelining sentences
+_PIPELINE_QUEUE_SIZE = 64
+_END_OF_STREAM = object()
+
+# Float scratch buffers reused across _convert_to_streaming calls; holds at
+# most one buffer per conversion that ran concurrently
+_SCRATCH_POOL = queue.LifoQueue()
+
+
+def _is_sentence_end(text: str, match) -> bool:
+    """Whether a run of terminators ends a sentence"""
+    if match.group().strip("."):
+        return True  # "?", "!" or a Chinese terminator
+    
+    # A "." only ends a sentence before whitespace or the end of the text,
+    # and not after a number ("3.14", "1. item") or an abbreviation ("Mr.")
+    end = match.end()
+    if end < len(text) and not text[end].isspace():
+        return False
+    start = match.start()
+    if start > 0 and text[start - 1].isdigit():
+        return False
+    word = _WORD_BEFORE_RE.search(text, 0, start)
+    return not (word and word.group(1).lower() in _ABBREVIATIONS)
+
+
+def _clause_length(clause: str) -> float:
+    """Clause length in words, counting CJK characters as fractions of a word"""
+    cjk_chars = len(_CJK_RE.findall(clause))
+    return len(_CJK_RE.sub(" ", clause).split()) + cjk_chars / _CJK_CHARS_PER_WORD
+
+
+def _iter_sentences(text: str) -> Generator[str, None, None]:
+    """Split text into sentences, also breaking long clauses after commas"""
+    start = 0
+    for match in _TERMINATOR_RE.finditer(text):
+        if _is_sentence_end(text, match):
+            yield from _iter_clauses(text[start:match.end()])
+            start = match.end()
+    yield from _iter_clauses(text[start:])
+
+
+def _iter_clauses(sentence: str) -> Generator[str, None, None]:
+    """Break a sentence after commas that close a long enough clause"""
+    start = 0
+    for comma in _CLAUSE_BREAK_RE.finditer(sentence):
+        clause = sentence[start:comma.end()]
+        if _clause_length(clause) >= _MIN_CLAUSE_WORDS:
+            clause = clause.strip()
+            if clause:
+                yield clause
+            start = comma.end()
+    
+    rest = sentence[start:].strip()
+    if rest:
+        yield rest
+
 
 class SynthesisMode(str, Enum):
     BATCH = "batch"
@@ -34,8 +115,31 @@ class VoiceManager:
         self.current_profile = None
         self.is_initialized = False
         
+        # Engines in registration order (primary first) and direct references
+        # used by the per-request selection paths
+        self._engine_priority: tuple = ()
+        self._realtime_engine = None
+        self._default_profile: Optional[VoiceProfile] = None
+        
+        # Bound synthesize / synthesize_streaming methods per engine (None if missing)
+        self._engine_methods: Dict[Any, tuple] = {}
+        
+        # Background worker for engine warmup and sentence-by-sentence
+        # synthesis ahead of streaming consumers, and its not yet finished jobs
+        # (cancelled on cleanup)
+        self._pipeline_executor = None
+        self._pipeline_pending = set()
+        
+        # Micro-batching state for synthesize_async, bound to the caller's event loop
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_loop = None
+        self._batch_task = None
+        
     def initialize(self) -> bool:
-        """Initialize voice engines"""
+        """Initialize voice engines (no-op if already initialized)"""
+        if self.is_initialized:
+            return True
+        
         try:
             logger.info("Initializing Voice Manager")
             
@@ -43,7 +147,7 @@ class VoiceManager:
             if settings.primary_voice_engine == VoiceEngine.XTTS_V2:
                 xtts_engine = XTTSEngine()
                 if xtts_engine.load_model():
-                    self.engines[VoiceEngine.XTTS_V2] = xtts_engine
+                    self._register_engine(VoiceEngine.XTTS_V2, xtts_engine)
                     self.current_engine = xtts_engine
                     logger.info("XTTS-v2 engine initialized as primary")
                 else:
@@ -53,7 +157,7 @@ class VoiceManager:
             if settings.primary_voice_engine == VoiceEngine.CHATTTS or settings.fallback_voice_engine == VoiceEngine.CHATTTS:
                 chattts_engine = ChatTTSEngine()
                 if chattts_engine.load_model():
-                    self.engines[VoiceEngine.CHATTTS] = chattts_engine
+                    self._register_engine(VoiceEngine.CHATTTS, chattts_engine)
                     if settings.primary_voice_engine == VoiceEngine.CHATTTS:
                         self.current_engine = chattts_engine
                     logger.info("ChatTTS engine initialized")
@@ -63,7 +167,7 @@ class VoiceManager:
             # Initialize RealtimeTTS engine
             realtime_engine = RealtimeTTSEngine()
             if realtime_engine.initialize():
-                self.engines[VoiceEngine.REALTIME_TTS] = realtime_engine
+                self._register_engine(VoiceEngine.REALTIME_TTS, realtime_engine)
                 if not self.current_engine:
                     self.current_engine = realtime_engine
                 logger.info("RealtimeTTS engine initialized")
@@ -77,6 +181,14 @@ class VoiceManager:
             # Load default voice profiles
             self._load_default_profiles()
             
+            # Prime XTTS kernels and speaker latents off the caller's thread
+            if VoiceEngine.XTTS_V2 in self.engines:
+                sample_paths = [
+                    profile.voice_sample_path for profile in self.voice_profiles.values()
+                    if profile.voice_sample_path
+                ]
+                self._submit_background(self.engines[VoiceEngine.XTTS_V2].warmup, sample_paths)
+            
             self.is_initialized = len(self.engines) > 0
             
             if self.is_initialized:
@@ -90,6 +202,24 @@ class VoiceManager:
             logger.error(f"Voice Manager initialization failed: {e}")
             return False
     
+    def _register_engine(self, name: str, engine):
+        """Add an engine and resolve its synthesis methods once"""
+        self.engines[name] = engine
+        self._engine_priority += (engine,)
+        if name == VoiceEngine.REALTIME_TTS:
+            self._realtime_engine = engine
+        self._engine_methods[engine] = (
+            getattr(engine, 'synthesize', None),
+            getattr(engine, 'synthesize_streaming', None)
+        )
+    
+    def _get_engine_methods(self, engine) -> tuple:
+        """Get (synthesize, synthesize_streaming) for an engine"""
+        methods = self._engine_methods.get(engine)
+        if methods is None:
+            methods = (getattr(engine, 'synthesize', None), getattr(engine, 'synthesize_streaming', None))
+        return methods
+    
     def synthesize(
         self,
         text: str,
@@ -140,6 +270,136 @@ class VoiceManager:
             logger.error(f"Synthesis failed: {e}")
             return self._try_fallback(text, voice_profile_name, language, mode, **kwargs)
     
+    async def synthesize_async(
+        self,
+        text: str,
+        voice_profile_name: Optional[str] = None,
+        language: str = "auto"
+    ) -> Optional[np.ndarray]:
+        """
+        Batch-mode synthesis for async callers
+        
+        Requests arriving within a few milliseconds of each other with the same
+        profile and language are synthesized together in one engine call when
+        the engine supports batching (ChatTTS); synthesis runs off the event loop.
+        """
+        if not self.is_initialized:
+            logger.error("Voice Manager not initialized")
+            return None
+        
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_loop = loop
+            self._batch_task = loop.create_task(self._batched_synthesize_worker(self._batch_queue))
+        
+        future = loop.create_future()
+        self._batch_queue.put_nowait((text, voice_profile_name, language, future))
+        return await future
+    
+    async def _batched_synthesize_worker(self, requests: asyncio.Queue):
+        """Collect queued requests into micro-batches and synthesize them in order"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await requests.get()]
+            deadline = loop.time() + _MICRO_BATCH_WINDOW
+            while len(batch) < _MICRO_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(requests.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            groups: Dict[tuple, list] = {}
+            for request in batch:
+                groups.setdefault((request[1], request[2]), []).append(request)
+            
+            for (voice_profile_name, language), group in groups.items():
+                texts = [request[0] for request in group]
+                try:
+                    results = await asyncio.wrap_future(
+                        self._submit_background(self._synthesize_group, texts, voice_profile_name, language)
+                    )
+                except Exception as e:
+                    logger.error(f"Batched synthesis failed: {e}")
+                    results = [None] * len(group)
+                
+                # Every future gets resolved, even if the group came back short
+                for i, request in enumerate(group):
+                    if not request[3].done():
+                        request[3].set_result(results[i] if i < len(results) else None)
+    
+    def _synthesize_group(self, texts: list, voice_profile_name: Optional[str], language: str) -> list:
+        """Synthesize texts sharing a profile and language, batched when the engine allows"""
+        engine = self._select_engine(SynthesisMode.BATCH)
+        synthesize_batch = getattr(engine, 'synthesize_batch', None)
+        if synthesize_batch and len(texts) > 1:
+            voice_profile = self._get_voice_profile(voice_profile_name)
+            results = synthesize_batch(texts, language=language, voice_profile=voice_profile)
+            if results is not None and len(results) == len(texts):
+                return results
+        
+        # No batched inference (XTTS-v2), or the batch failed or did not return
+        # one result per text: one at a time, with fallback
+        return [self.synthesize(text, voice_profile_name, language) for text in texts]
+    
+    async def synthesize_streaming_async(
+        self,
+        text: str,
+        voice_profile_name: Optional[str] = None,
+        language: str = "auto",
+        **kwargs
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Stream synthesized chunks to an async consumer
+        
+        The blocking streaming generator is driven by a background thread that
+        hands chunks to the event loop, so synthesis never stalls it. The queue
+        is bounded: the thread blocks while a slow consumer catches up.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+        
+        def hand_off(item) -> bool:
+            """Block until the event loop has queued item; False once nobody is listening"""
+            if stop.is_set():
+                return False
+            try:
+                asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+            except (RuntimeError, CancelledError):
+                # Event loop closed or the put was cancelled
+                return False
+            return True
+        
+        def produce():
+            try:
+                stream = self.synthesize(text, voice_profile_name, language, mode=SynthesisMode.STREAMING, **kwargs)
+                for chunk in stream or ():
+                    if not hand_off(chunk):
+                        return
+            except Exception as e:
+                logger.error(f"Async streaming synthesis failed: {e}")
+            finally:
+                hand_off(_END_OF_STREAM)
+        
+        # A dedicated thread: the pipeline executor may be busy feeding this stream
+        threading.Thread(target=produce, name="voice-stream-async", daemon=True).start()
+        
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _END_OF_STREAM:
+                    break
+                yield chunk
+        finally:
+            stop.set()
+            # Free a slot so a producer blocked on a full queue sees the stop
+            while not chunks.empty():
+                chunks.get_nowait()
+    
     def _synthesize_batch(
         self,
         engine,
@@ -150,9 +410,10 @@ class VoiceManager:
     ) -> Optional[np.ndarray]:
         """Batch synthesis"""
         try:
-            if hasattr(engine, 'synthesize'):
+            synthesize = self._get_engine_methods(engine)[0]
+            if synthesize:
                 speaker_wav = voice_profile.voice_sample_path if voice_profile else None
-                return engine.synthesize(
+                return synthesize(
                     text=text,
                     language=language,
                     speaker_wav=speaker_wav,
@@ -177,16 +438,21 @@ class VoiceManager:
     ) -> Optional[Generator[bytes, None, None]]:
         """Streaming synthesis"""
         try:
-            if hasattr(engine, 'synthesize_streaming'):
-                return engine.synthesize_streaming(
+            synthesize, synthesize_streaming = self._get_engine_methods(engine)
+            if synthesize_streaming:
+                sentences = list(_iter_sentences(text))
+                if len(sentences) > 1:
+                    return self._pipeline_sentences(synthesize_streaming, sentences, language, voice_profile, **kwargs)
+                
+                return synthesize_streaming(
                     text=text,
                     language=language,
                     voice_profile=voice_profile,
                     **kwargs
                 )
-            elif hasattr(engine, 'synthesize'):
+            elif synthesize:
                 # Fallback: convert batch to streaming
-                audio = engine.synthesize(
+                audio = synthesize(
                     text=text,
                     language=language,
                     speaker_wav=voice_profile.voice_sample_path if voice_profile else None,
@@ -203,6 +469,75 @@ class VoiceManager:
             logger.error(f"Streaming synthesis failed: {e}")
             return None
     
+    def _pipeline_sentences(
+        self,
+        synthesize_streaming,
+        sentences: Iterable[str],
+        language: str,
+        voice_profile: Optional[VoiceProfile],
+        **kwargs
+    ) -> Generator[Any, None, None]:
+        """Stream sentences in order, synthesizing the next ones while earlier chunks are consumed"""
+        chunks = queue.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for sentence in sentences:
+                    stream = synthesize_streaming(
+                        text=sentence,
+                        language=language,
+                        voice_profile=voice_profile,
+                        **kwargs
+                    )
+                    for chunk in stream or ():
+                        chunks.put(chunk)
+                        if stop.is_set():
+                            return
+            except Exception as e:
+                logger.error(f"Sentence synthesis failed: {e}")
+            finally:
+                if not stop.is_set():
+                    chunks.put(_END_OF_STREAM)
+        
+        producer = self._submit_background(produce)
+        # Cancelled by cleanup before it ran: end the stream instead of hanging
+        producer.add_done_callback(lambda future: future.cancelled() and chunks.put(_END_OF_STREAM))
+        
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _END_OF_STREAM:
+                    break
+                yield chunk
+        finally:
+            # Consumer stopped early: let a blocked producer finish its put and exit
+            stop.set()
+            while True:
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    break
+    
+    def _get_pipeline_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the single background synthesis worker, creating it on first use
+        
+        This worker does not serialize engine access on its own, because
+        streams also run on callers' threads. The engines lock their models
+        internally.
+        """
+        if self._pipeline_executor is None:
+            self._pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-pipeline")
+        return self._pipeline_executor
+    
+    def _submit_background(self, fn, *args) -> Future:
+        """Run fn on the background worker, tracking the job until it finishes"""
+        future = self._get_pipeline_executor().submit(fn, *args)
+        self._pipeline_pending.add(future)
+        future.add_done_callback(self._pipeline_pending.discard)
+        return future
+    
     def _synthesize_realtime(
         self,
         engine,
@@ -214,8 +549,8 @@ class VoiceManager:
         """Real-time synthesis"""
         try:
             # Prefer RealtimeTTS for real-time mode
-            if VoiceEngine.REALTIME_TTS in self.engines:
-                realtime_engine = self.engines[VoiceEngine.REALTIME_TTS]
+            realtime_engine = self._realtime_engine
+            if realtime_engine is not None:
                 return realtime_engine.synthesize_streaming(
                     text=text,
                     voice_profile=voice_profile,
@@ -229,29 +564,51 @@ class VoiceManager:
             logger.error(f"Real-time synthesis failed: {e}")
             return None
     
-    def _convert_to_streaming(self, audio: np.ndarray, chunk_size: int = 1024) -> Generator[bytes, None, None]:
-        """Convert batch audio to streaming chunks"""
+    def _convert_to_streaming(self, audio: np.ndarray, chunk_size: int = 1024) -> Generator[memoryview, None, None]:
+        """
+        Convert batch audio to streaming chunks
+        
+        Chunks are read-only PCM16 memoryviews into one buffer allocated per
+        clip; the buffer is never reused, so chunks stay valid after yielding.
+        """
         try:
-            # Convert to int16 and bytes
-            audio_int16 = (audio * 32767).astype(np.int16)
-            audio_bytes = audio_int16.tobytes()
+            samples = np.ravel(audio)
+            pcm = np.empty(samples.size, dtype=np.int16)
+            pcm_bytes = memoryview(pcm).cast('B').toreadonly()
+            
+            # Scale one chunk at a time through pooled scratch buffers, so the
+            # first chunk is ready without converting the whole clip
+            scaled_dtype = np.result_type(samples.dtype, np.float32)
+            try:
+                scaled = _SCRATCH_POOL.get_nowait()
+            except queue.Empty:
+                scaled = None
+            if scaled is None or scaled.size < chunk_size or scaled.dtype != scaled_dtype:
+                scaled = np.empty(chunk_size, dtype=scaled_dtype)
             
-            # Yield in chunks
-            for i in range(0, len(audio_bytes), chunk_size * 2):  # *2 for int16
-                yield audio_bytes[i:i + chunk_size * 2]
+            try:
+                for i in range(0, samples.size, chunk_size):
+                    chunk = samples[i:i + chunk_size]
+                    n = chunk.size
+                    np.multiply(chunk, 32767, out=scaled[:n], casting='unsafe')
+                    np.clip(scaled[:n], -32768, 32767, out=scaled[:n])
+                    np.copyto(pcm[i:i + n], scaled[:n], casting='unsafe')
+                    yield pcm_bytes[i * 2:(i + n) * 2]
+            finally:
+                _SCRATCH_POOL.put(scaled)
                 
         except Exception as e:
             logger.error(f"Audio conversion failed: {e}")
     
     def _select_engine(self, mode: SynthesisMode):
         """Select appropriate engine for synthesis mode"""
-        if mode == SynthesisMode.REALTIME and VoiceEngine.REALTIME_TTS in self.engines:
-            return self.engines[VoiceEngine.REALTIME_TTS]
-        elif mode in [SynthesisMode.BATCH, SynthesisMode.STREAMING] and self.current_engine:
+        if mode == SynthesisMode.REALTIME and self._realtime_engine is not None:
+            return self._realtime_engine
+        elif (mode == SynthesisMode.BATCH or mode == SynthesisMode.STREAMING) and self.current_engine:
             return self.current_engine
-        elif self.engines:
-            # Return any available engine
-            return next(iter(self.engines.values()))
+        elif self._engine_priority:
+            # Return the highest-priority available engine
+            return self._engine_priority[0]
         else:
             return None
     
@@ -281,11 +638,9 @@ class VoiceManager:
             return self.voice_profiles[profile_name]
         elif self.current_profile:
             return self.current_profile
-        elif self.voice_profiles:
-            # Return first available profile
-            return next(iter(self.voice_profiles.values()))
         else:
-            return None
+            # First profile ever added, if any
+            return self._default_profile
     
     def _load_default_profiles(self):
         """Load default voice profiles"""
@@ -322,6 +677,7 @@ class VoiceManager:
         
         # Set default profile
         self.current_profile = self.voice_profiles["cute_girl"]
+        self._default_profile = self._default_profile or self.current_profile
         
         logger.info(f"Loaded {len(self.voice_profiles)} default voice profiles")
     
@@ -329,6 +685,14 @@ class VoiceManager:
         """Add a new voice profile"""
         try:
             self.voice_profiles[profile.name] = profile
+            if self._default_profile is None:
+                self._default_profile = profile
+            
+            # Encode the reference voice now rather than on the profile's first request
+            xtts_engine = self.engines.get(VoiceEngine.XTTS_V2)
+            if xtts_engine is not None and profile.voice_sample_path:
+                self._submit_background(xtts_engine.prepare_speaker, profile.voice_sample_path)
+            
             logger.info(f"Added voice profile: {profile.name}")
             return True
         except Exception as e:
@@ -365,11 +729,27 @@ class VoiceManager:
     
     def cleanup(self):
         """Cleanup all engines"""
+        if self._batch_task and not self._batch_loop.is_closed():
+            self._batch_loop.call_soon_threadsafe(self._batch_task.cancel)
+        self._batch_queue = None
+        self._batch_loop = None
+        self._batch_task = None
+        
+        if self._pipeline_executor:
+            # shutdown(cancel_futures=True) needs Python 3.9; cancel queued jobs directly
+            for future in list(self._pipeline_pending):
+                future.cancel()
+            self._pipeline_executor.shutdown(wait=False)
+            self._pipeline_executor = None
+        
         for engine in self.engines.values():
             if hasattr(engine, 'cleanup'):
                 engine.cleanup()
         
         self.engines.clear()
+        self._engine_methods.clear()
+        self._engine_priority = ()
+        self._realtime_engine = None
         self.current_engine = None
         self.fallback_engine = None
         self.is_initialized = False
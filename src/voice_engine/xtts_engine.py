@@ -2,25 +2,98 @@
 XTTS-v2 Engine for high-quality multilingual voice synthesis
 """
 import os
+import math
+import queue
+import time
+import contextlib
+import threading
 import torch
 import torchaudio
 import numpy as np
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, List, Union, Tuple
 from pathlib import Path
+from functools import lru_cache
 import logging
 
 try:
-    from TTS.api import TTS
-    from TTS.tts.configs.xtts_config import XttsConfig
-    from TTS.tts.models.xtts import Xtts
+    from langdetect import detect as detect_language
 except ImportError:
-    TTS = None
-    print("Warning: TTS library not installed. Install with: pip install TTS")
+    detect_language = None
+
+# Optional: int8 GPT linear layers on GPU
+try:
+    import bitsandbytes as bnb
+except ImportError:
+    bnb = None
 
 from ..config import settings, VoiceProfile
 
 logger = logging.getLogger(__name__)
 
+# Bytes of speaker conditioning latents kept in memory. On overflow the entry
+# with the lowest duration * (1 + alpha * recency) score is evicted, so long,
+# recently used references outlive short ones that were used once.
+_SPEAKER_CACHE_BYTES = 64 * 1024 * 1024
+_SPEAKER_RECENCY_WEIGHT = 0.5
+
+# Seconds a cached reference WAV is trusted before it is stat'ed again
+_SPEAKER_STAT_TTL = 60.0
+
+# Characters of input text used for language detection
+_DETECT_PREFIX_LENGTH = 200
+
+# langdetect codes mapped to XTTS-v2 codes; anything else falls back to English
+_DETECTED_LANG_MAP = {
+    "zh": "zh-cn",
+    "zh-cn": "zh-cn",
+    "en": "en",
+    "ja": "ja",
+    "ko": "ko"
+}
+
+# Supported languages for XTTS-v2
+_SUPPORTED_LANGUAGES = frozenset((
+    "en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru",
+    "nl", "cs", "ar", "zh-cn", "ja", "hu", "ko"
+))
+
+# Language names and aliases mapped to XTTS-v2 codes
+_XTTS_LANG_MAP = {
+    "zh": "zh-cn",
+    "chinese": "zh-cn",
+    "english": "en",
+    "japanese": "ja",
+    "korean": "ko"
+}
+
+_HALF_PRECISIONS = {"bfloat16": torch.bfloat16, "float16": torch.float16}
+
+# XTTS submodules compiled in place on GPU. Default mode with dynamic shapes:
+# the GPT step model sees a new KV length every token, and inference_stream
+# keeps vocoder outputs across calls, so CUDA graph modes (reduce-overhead,
+# max-autotune) would re-record every step and overwrite the kept outputs.
+_COMPILE_TARGETS = ("gpt.gpt_inference", "hifigan_decoder")
+
+# XttsConfig fields that TTS.api passes to the model as sampling settings
+_SAMPLING_SETTINGS = ("temperature", "length_penalty", "repetition_penalty", "top_k", "top_p")
+
+# PitchShift resamples from int(sample_rate * pitch) to sample_rate with a
+# kernel of sample_rate / gcd rows, so pitches are snapped to a grid whose
+# step divides the sample rate and is at most 1/100 of it, keeping the gcd
+# (and the kernel small) for any pitch a profile produces
+_PITCH_GRID_STEPS = 100
+_PITCH_SHIFTER_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=2048)
+def _detect_language_cached(prefix: str) -> str:
+    """Detect the XTTS-v2 language code for a text prefix"""
+    try:
+        return _DETECTED_LANG_MAP.get(detect_language(prefix), "en")
+    except Exception:
+        # Default to English if detection fails (or langdetect is missing)
+        return "en"
+
 
 class XTTSEngine:
     """XTTS-v2 Text-to-Speech Engine"""
@@ -33,23 +106,49 @@ class XTTSEngine:
         self.sample_rate = 22050
         self.is_loaded = False
         
+        # Speaker latents keyed by (path, mtime, size) -> [latents, ref duration, last use, bytes]
+        self._speaker_cache: Dict[tuple, list] = {}
+        self._speaker_cache_bytes = 0
+        self._speaker_uses = 0
+        self._speaker_keys: Dict[str, tuple] = {}  # path -> (recheck deadline, cache key)
+        self._sampling_settings: Dict[str, Any] = {}
+        self.inference_dtype = None  # Autocast dtype when the GPT runs in half precision
+        
+        # Serializes model inference and speaker cache updates between callers
+        # (VoiceManager's worker, streaming threads and direct calls)
+        self._engine_lock = threading.RLock()
+        
+        # Phase-vocoder pitch shifters keyed by (snapped resample rate, device)
+        self._pitch_step = max(
+            step for step in range(1, self.sample_rate // _PITCH_GRID_STEPS + 1)
+            if self.sample_rate % step == 0
+        )
+        self._pitch_shifter = lru_cache(maxsize=_PITCH_SHIFTER_CACHE_SIZE)(self._build_pitch_shifter)
+        
         # Supported languages for XTTS-v2
-        self.supported_languages = [
-            "en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", 
-            "nl", "cs", "ar", "zh-cn", "ja", "hu", "ko"
-        ]
+        self.supported_languages = _SUPPORTED_LANGUAGES
         
     def load_model(self) -> bool:
         """Load XTTS-v2 model"""
         try:
-            if TTS is None:
-                logger.error("TTS library not available")
+            # Coqui TTS takes seconds to import, so only pay for it when XTTS is used
+            try:
+                from TTS.api import TTS
+            except ImportError:
+                logger.error("TTS library not available. Install with: pip install TTS")
                 return False
-                
+            
             logger.info(f"Loading XTTS-v2 model on {self.device}")
             
             # Initialize TTS with XTTS-v2
             self.model = TTS(self.model_name).to(self.device)
+            
+            config = self.model.synthesizer.tts_model.config
+            self._sampling_settings = {name: getattr(config, name) for name in _SAMPLING_SETTINGS}
+            self._clear_speaker_cache()
+            self._apply_precision()
+            if settings.enable_compile and self.device == "cuda":
+                self._compile_model()
             self.is_loaded = True
             
             logger.info("XTTS-v2 model loaded successfully")
@@ -59,6 +158,108 @@ class XTTSEngine:
             logger.error(f"Failed to load XTTS-v2 model: {e}")
             return False
     
+    def _apply_precision(self):
+        """Lower the XTTS GPT's precision according to settings.model_precision"""
+        self.inference_dtype = None
+        precision = settings.model_precision
+        if precision == "float32":
+            return
+        
+        # Only the autoregressive GPT; the speaker encoder and HiFi-GAN
+        # decoder stay in float32 and run under autocast
+        gpt = self.model.synthesizer.tts_model.gpt
+        try:
+            if precision in _HALF_PRECISIONS and self.device == "cuda":
+                gpt.to(_HALF_PRECISIONS[precision])
+                self.inference_dtype = _HALF_PRECISIONS[precision]
+            elif precision == "int8" and self.device == "cpu":
+                # Weight-only dynamic quantization of the Linear layers
+                torch.ao.quantization.quantize_dynamic(
+                    gpt, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+            elif precision == "int8" and self.device == "cuda" and bnb is not None:
+                # LLM.int8 Linear layers in a float16 GPT
+                gpt.to(torch.float16)
+                self.inference_dtype = torch.float16
+                self._swap_int8_linears(gpt)
+            else:
+                logger.warning(f"Model precision {precision} not supported on {self.device}, using float32")
+                return
+            
+            logger.info(f"XTTS GPT running in {precision}")
+        except Exception as e:
+            logger.error(f"Failed to apply model precision {precision}: {e}")
+    
+    def _swap_int8_linears(self, module: torch.nn.Module):
+        """Replace nn.Linear layers under module with bitsandbytes int8 layers"""
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear):
+                int8_linear = bnb.nn.Linear8bitLt(
+                    child.in_features, child.out_features,
+                    bias=child.bias is not None, has_fp16_weights=False, threshold=6.0
+                )
+                # Int8Params quantizes when moved to the GPU
+                int8_linear.weight = bnb.nn.Int8Params(
+                    child.weight.data.cpu(), requires_grad=False, has_fp16_weights=False
+                )
+                if child.bias is not None:
+                    int8_linear.bias = child.bias
+                setattr(module, name, int8_linear.to(child.weight.device))
+            else:
+                self._swap_int8_linears(child)
+    
+    def warmup(self, speaker_wavs: List[str]):
+        """Compute speaker latents for the given references and run one short synthesis"""
+        try:
+            warm_wav = None
+            for speaker_wav in speaker_wavs:
+                if self.prepare_speaker(speaker_wav) and warm_wav is None:
+                    warm_wav = speaker_wav
+            
+            # XTTS-v2 has no built-in default speaker, so kernels can only be
+            # warmed when a reference voice is available
+            if warm_wav is not None:
+                self.synthesize("Hello.", language="en", speaker_wav=warm_wav)
+                logger.info("XTTS-v2 warmup complete")
+                
+        except Exception as e:
+            logger.warning(f"XTTS-v2 warmup failed: {e}")
+    
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        """Load, resample and encode a reference WAV ahead of its first synthesis"""
+        try:
+            if not self.is_loaded:
+                return False
+            return self._get_speaker_latents(speaker_wav) is not None
+        except Exception as e:
+            logger.warning(f"Failed to prepare speaker {speaker_wav}: {e}")
+            return False
+    
+    def _compile_model(self):
+        """Compile the XTTS GPT step model and vocoder in place"""
+        tts_model = self.model.synthesizer.tts_model
+        for path in _COMPILE_TARGETS:
+            module = tts_model
+            for name in path.split("."):
+                module = getattr(module, name, None)
+            
+            if not isinstance(module, torch.nn.Module) or not hasattr(module, "compile"):
+                continue
+            try:
+                # In place, so calls made from inside XTTS's generate loop are compiled too
+                module.compile(dynamic=True, fullgraph=False)
+                logger.info(f"Compiled XTTS {path}")
+            except Exception as e:
+                logger.warning(f"Failed to compile XTTS {path}: {e}")
+    
+    def _inference_context(self) -> contextlib.ExitStack:
+        """No autograd bookkeeping; autocast when the GPT runs in half precision"""
+        ctx = contextlib.ExitStack()
+        ctx.enter_context(torch.inference_mode())
+        if self.inference_dtype is not None:
+            ctx.enter_context(torch.autocast("cuda", dtype=self.inference_dtype))
+        return ctx
+    
     def clone_voice(self, speaker_wav_path: str, output_path: str = None) -> bool:
         """Clone voice from audio sample"""
         try:
@@ -105,16 +306,7 @@ class XTTSEngine:
                 if not self.load_model():
                     return None
             
-            # Auto-detect language if needed
-            if language == "auto":
-                language = self._detect_language(text)
-            
-            # Map language codes
-            language = self._map_language_code(language)
-            
-            if language not in self.supported_languages:
-                logger.warning(f"Language {language} not supported, using English")
-                language = "en"
+            language = self._resolve_language(text, language)
             
             # Apply voice profile settings
             synthesis_kwargs = {}
@@ -126,116 +318,285 @@ class XTTSEngine:
                 })
             
             # Synthesize speech
-            if speaker_wav and os.path.exists(speaker_wav):
-                # Voice cloning mode
-                wav = self.model.tts(
-                    text=text,
-                    speaker_wav=speaker_wav,
-                    language=language,
-                    **synthesis_kwargs
-                )
-            else:
-                # Use default voice
-                wav = self.model.tts(
-                    text=text,
-                    language=language,
-                    **synthesis_kwargs
-                )
-            
-            # Convert to numpy array if needed
-            if isinstance(wav, torch.Tensor):
-                wav = wav.cpu().numpy()
+            with self._engine_lock:
+                speaker_latents = self._get_speaker_latents(speaker_wav) if speaker_wav else None
+                with self._inference_context():
+                    if speaker_latents is not None:
+                        # Voice cloning mode, reusing cached conditioning latents
+                        gpt_cond_latent, speaker_embedding = speaker_latents
+                        wav = self.model.synthesizer.tts_model.inference(
+                            text,
+                            language,
+                            gpt_cond_latent,
+                            speaker_embedding,
+                            enable_text_splitting=True,
+                            **self._sampling_settings,
+                            **synthesis_kwargs
+                        )["wav"]
+                    else:
+                        # Use default voice
+                        wav = self.model.tts(
+                            text=text,
+                            language=language,
+                            **synthesis_kwargs
+                        )
             
             # Apply voice profile modifications
             if voice_profile:
                 wav = self._apply_voice_modifications(wav, voice_profile)
             
+            # Convert to numpy array once, after all modifications
+            if isinstance(wav, torch.Tensor):
+                wav = wav.float().cpu().numpy()
+            elif isinstance(wav, np.ndarray) and wav.dtype == np.float16:
+                wav = wav.astype(np.float32)
+            
             return wav
             
         except Exception as e:
             logger.error(f"Speech synthesis failed: {e}")
             return None
     
+    def _resolve_language(self, text: str, language: str) -> str:
+        """Detect and map the language code to one XTTS-v2 supports"""
+        # Auto-detect language if needed
+        if language == "auto":
+            language = self._detect_language(text)
+        
+        # Map language codes
+        language = self._map_language_code(language)
+        
+        if language not in self.supported_languages:
+            logger.warning(f"Language {language} not supported, using English")
+            language = "en"
+        
+        return language
+    
+    def _get_speaker_latents(self, speaker_wav: str) -> Optional[Tuple[torch.Tensor, torch.Tensor]]:
+        """Get (gpt_cond_latent, speaker_embedding) for a reference WAV, computing them on a cache miss"""
+        with self._engine_lock:
+            now = time.monotonic()
+            entry = self._speaker_keys.get(speaker_wav)
+            if entry and entry[0] > now and entry[1] in self._speaker_cache:
+                key = entry[1]
+            else:
+                # Missing files surface here instead of in a separate exists() check
+                try:
+                    stat = os.stat(speaker_wav)
+                except OSError:
+                    self._speaker_keys.pop(speaker_wav, None)
+                    return None
+                
+                key = (speaker_wav, stat.st_mtime_ns, stat.st_size)
+                self._speaker_keys[speaker_wav] = (now + _SPEAKER_STAT_TTL, key)
+            
+            self._speaker_uses += 1
+            cached = self._speaker_cache.get(key)
+            if cached is None:
+                tts_model = self.model.synthesizer.tts_model
+                config = tts_model.config
+                with self._inference_context():
+                    gpt_cond_latent, speaker_embedding = tts_model.get_conditioning_latents(
+                        audio_path=[speaker_wav],
+                        gpt_cond_len=config.gpt_cond_len,
+                        max_ref_length=config.max_ref_len,
+                        sound_norm_refs=config.sound_norm_refs
+                    )
+                latents = (gpt_cond_latent.cpu(), speaker_embedding.cpu())
+                nbytes = sum(t.numel() * t.element_size() for t in latents)
+                cached = [latents, self._reference_duration(speaker_wav), self._speaker_uses, nbytes]
+                self._evict_speaker_latents(nbytes)
+                self._speaker_cache[key] = cached
+                self._speaker_cache_bytes += nbytes
+            else:
+                cached[2] = self._speaker_uses
+            
+            return tuple(t.to(self.device, non_blocking=True) for t in cached[0])
+    
+    def _evict_speaker_latents(self, incoming_bytes: int):
+        """Evict the lowest-scoring speaker latents until incoming_bytes fits"""
+        while self._speaker_cache and self._speaker_cache_bytes + incoming_bytes > _SPEAKER_CACHE_BYTES:
+            uses = self._speaker_uses
+            evicted_key = min(
+                self._speaker_cache,
+                key=lambda k: self._speaker_cache[k][1] * (1 + _SPEAKER_RECENCY_WEIGHT * self._speaker_cache[k][2] / uses)
+            )
+            self._speaker_cache_bytes -= self._speaker_cache.pop(evicted_key)[3]
+            self._speaker_keys.pop(evicted_key[0], None)
+    
+    def _reference_duration(self, speaker_wav: str) -> float:
+        """Duration of a reference WAV in seconds, read from its header"""
+        try:
+            info = torchaudio.info(speaker_wav)
+            return info.num_frames / info.sample_rate
+        except Exception:
+            return 1.0
+    
+    def _clear_speaker_cache(self):
+        """Drop all cached speaker latents"""
+        with self._engine_lock:
+            self._speaker_cache.clear()
+            self._speaker_keys.clear()
+            self._speaker_cache_bytes = 0
+            self._speaker_uses = 0
+    
     def synthesize_streaming(
         self,
         text: str,
         language: str = "auto",
         speaker_wav: Optional[str] = None,
         voice_profile: Optional[VoiceProfile] = None,
-        chunk_size: int = 1024
+        chunk_size: int = 1024,
+        stream_chunk_size: int = 20
     ):
         """
         Streaming synthesis (generator)
         
+        With a reference voice, audio is yielded as the XTTS GPT decodes it;
+        the default voice falls back to synthesizing the full clip first.
+        
         Args:
             text: Text to synthesize
             language: Language code
             speaker_wav: Speaker audio path
             voice_profile: Voice profile
             chunk_size: Audio chunk size
+            stream_chunk_size: GPT tokens per decoded chunk (smaller = faster first audio)
         
         Yields:
             Audio chunks
         """
         try:
-            # For now, synthesize full audio and chunk it
-            # Future: Implement true streaming synthesis
-            audio = self.synthesize(text, language, speaker_wav, voice_profile)
+            if not self.is_loaded:
+                if not self.load_model():
+                    yield None
+                    return
+            
+            if speaker_wav is None and voice_profile:
+                speaker_wav = voice_profile.voice_sample_path
             
-            if audio is not None:
-                # Yield audio in chunks
-                for i in range(0, len(audio), chunk_size):
-                    yield audio[i:i + chunk_size]
+            speaker_latents = self._get_speaker_latents(speaker_wav) if speaker_wav else None
+            if speaker_latents is None:
+                audio = self.synthesize(text, language, speaker_wav, voice_profile)
+                
+                if audio is not None:
+                    # Yield audio in chunks
+                    for i in range(0, len(audio), chunk_size):
+                        yield audio[i:i + chunk_size]
+                return
+            
+            language = self._resolve_language(text, language)
+            gpt_cond_latent, speaker_embedding = speaker_latents
+            synthesis_kwargs = {"speed": voice_profile.speed} if voice_profile else {}
+            
+            # XTTS keeps per-generation state on the model (the GPT prefix
+            # and its positions), so a stream must own the engine lock from
+            # its first token to its last. A producer thread holds it for the
+            # whole generation while the caller plays back earlier chunks.
+            wav_chunks = queue.SimpleQueue()
+            stop = threading.Event()
+            producer = threading.Thread(
+                target=self._stream_producer,
+                args=(text, language, speaker_latents, stream_chunk_size, synthesis_kwargs, wav_chunks, stop),
+                daemon=True
+            )
+            producer.start()
+            
+            # Shifting each ~1 s chunk on its own would put a discontinuity at
+            # every boundary, so pitched profiles are shifted once over the
+            # whole text (a single sentence when VoiceManager pipelines it)
+            shift_pitch = voice_profile is not None and voice_profile.pitch != 1.0
+            pitched_chunks = []
+            try:
+                while True:
+                    wav_chunk = wav_chunks.get()
+                    if wav_chunk is None:
+                        break
+                    
+                    if shift_pitch:
+                        pitched_chunks.append(wav_chunk)
+                        continue
+                    
+                    audio = wav_chunk.float().cpu().numpy()
+                    for i in range(0, len(audio), chunk_size):
+                        yield audio[i:i + chunk_size]
+                
+                if pitched_chunks:
+                    audio = self._apply_voice_modifications(torch.cat(pitched_chunks), voice_profile)
+                    audio = audio.float().cpu().numpy()
+                    for i in range(0, len(audio), chunk_size):
+                        yield audio[i:i + chunk_size]
+            finally:
+                # Consumer done or gone: stop generating before the next
+                # request gets the model
+                stop.set()
+                producer.join()
                     
         except Exception as e:
             logger.error(f"Streaming synthesis failed: {e}")
             yield None
     
+    def _stream_producer(
+        self,
+        text: str,
+        language: str,
+        speaker_latents: Tuple[torch.Tensor, torch.Tensor],
+        stream_chunk_size: int,
+        synthesis_kwargs: Dict[str, Any],
+        wav_chunks: queue.SimpleQueue,
+        stop: threading.Event
+    ):
+        """Run a streaming XTTS inference under the engine lock and push each chunk to the queue until stopped"""
+        gpt_cond_latent, speaker_embedding = speaker_latents
+        try:
+            with self._engine_lock, self._inference_context():
+                stream = self.model.synthesizer.tts_model.inference_stream(
+                    text,
+                    language,
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    stream_chunk_size=stream_chunk_size,
+                    overlap_wav_len=1024,
+                    enable_text_splitting=True,
+                    **self._sampling_settings,
+                    **synthesis_kwargs
+                )
+                try:
+                    for wav_chunk in stream:
+                        if stop.is_set():
+                            break
+                        wav_chunks.put(wav_chunk)
+                finally:
+                    stream.close()
+                    
+        except Exception as e:
+            logger.error(f"Streaming inference failed: {e}")
+        finally:
+            wav_chunks.put(None)
+    
     def _detect_language(self, text: str) -> str:
         """Detect language from text"""
-        try:
-            from langdetect import detect
-            detected = detect(text)
-            
-            # Map common language codes
-            lang_map = {
-                "zh": "zh-cn",
-                "zh-cn": "zh-cn",
-                "en": "en",
-                "ja": "ja",
-                "ko": "ko"
-            }
-            
-            return lang_map.get(detected, "en")
-            
-        except Exception:
-            # Default to English if detection fails
-            return "en"
+        return _detect_language_cached(text[:_DETECT_PREFIX_LENGTH])
     
     def _map_language_code(self, language: str) -> str:
         """Map language codes to XTTS-v2 format"""
-        lang_map = {
-            "zh": "zh-cn",
-            "chinese": "zh-cn",
-            "english": "en",
-            "japanese": "ja",
-            "korean": "ko"
-        }
-        return lang_map.get(language.lower(), language)
+        return _XTTS_LANG_MAP.get(language if language.islower() else language.lower(), language)
     
-    def _apply_voice_modifications(self, audio: np.ndarray, voice_profile: VoiceProfile) -> np.ndarray:
-        """Apply voice profile modifications to audio"""
+    def _apply_voice_modifications(
+        self,
+        audio: Union[torch.Tensor, np.ndarray],
+        voice_profile: VoiceProfile
+    ) -> Union[torch.Tensor, np.ndarray]:
+        """Apply voice profile modifications to audio, on whichever device it lives"""
         try:
             # Apply pitch modification if needed
             if voice_profile.pitch != 1.0:
-                # Simple pitch shifting using resampling
-                # For better quality, consider using librosa.effects.pitch_shift
-                target_length = int(len(audio) / voice_profile.pitch)
-                audio = np.interp(
-                    np.linspace(0, len(audio), target_length),
-                    np.arange(len(audio)),
-                    audio
-                )
+                # Phase-vocoder pitch shift keeps the duration unchanged
+                if not isinstance(audio, torch.Tensor):
+                    audio = torch.from_numpy(np.asarray(audio, dtype=np.float32))
+                shifter = self._get_pitch_shifter(voice_profile.pitch, audio.device)
+                with torch.inference_mode():
+                    audio = shifter(audio.float())
             
             # Speed is already handled in synthesis
             
@@ -245,6 +606,19 @@ class XTTSEngine:
             logger.error(f"Voice modification failed: {e}")
             return audio
     
+    def _get_pitch_shifter(self, pitch: float, device: torch.device) -> torch.nn.Module:
+        """Get a cached PitchShift transform for the nearest pitch on the resample grid"""
+        resample_rate = max(round(self.sample_rate * pitch / self._pitch_step), 1) * self._pitch_step
+        return self._pitch_shifter(resample_rate, str(device))
+    
+    def _build_pitch_shifter(self, resample_rate: int, device: str) -> torch.nn.Module:
+        """Build a PitchShift that resamples from exactly resample_rate"""
+        # PitchShift truncates sample_rate * 2 ** (n_steps / 12); aim half a
+        # sample above resample_rate so float error cannot drop it to the
+        # next integer (and the gcd with it)
+        n_steps = 12 * math.log2((resample_rate + 0.5) / self.sample_rate)
+        return torchaudio.transforms.PitchShift(self.sample_rate, n_steps=n_steps).to(device)
+    
     def get_available_speakers(self) -> list:
         """Get list of available speakers"""
         # XTTS-v2 uses voice cloning, so speakers are dynamic
@@ -256,6 +630,9 @@ class XTTSEngine:
             del self.model
             self.model = None
         
+        self._clear_speaker_cache()
+        self._pitch_shifter.cache_clear()
+        
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         
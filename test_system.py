@@ -5,10 +5,24 @@ AI语音直播主播 - 系统测试脚本
 
 Quick test script to verify system functionality
 """
+import argparse
 import asyncio
+import contextvars
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
 import logging
 import sys
 import time
+from functools import lru_cache, wraps
+from pathlib import Path
+
+# Optional: uvloop gives a faster event loop for the gathered tests
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Configure logging
 logging.basicConfig(
@@ -18,275 +32,511 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Records logged by a running test, written out as one block when it ends so
+# concurrent tests do not interleave their output
+_TEST_LOG = contextvars.ContextVar("test_log", default=None)
+
+
+class _TestLogBuffer(logging.Filter):
+    """Hold back records logged inside a running test"""
+    
+    def filter(self, record):
+        records = _TEST_LOG.get()
+        if records is None:
+            return True
+        records.append(record)
+        return False
+
+
+logger.addFilter(_TestLogBuffer())
+
+# Subsystems are imported once for all tests. A package that fails to import
+# leaves its names as None and its error in _IMPORT_ERRORS for test_imports.
+_IMPORT_ERRORS = {}
+
+try:
+    from src.config import settings, get_settings, VoiceProfile
+except ImportError as e:
+    settings = get_settings = VoiceProfile = None
+    _IMPORT_ERRORS["Config"] = e
+
+# The voice engines (torch, TTS backends) load on first attribute access,
+# inside the tests that need them
+try:
+    import src.voice_engine as voice_engine
+except ImportError as e:
+    voice_engine = None
+    _IMPORT_ERRORS["Voice engine"] = e
+
+try:
+    from src.characters import PersonalityManager, ASMRManager, VoiceProfileManager
+except ImportError as e:
+    PersonalityManager = ASMRManager = VoiceProfileManager = None
+    _IMPORT_ERRORS["Character system"] = e
+
+try:
+    from src.language import TextProcessor, EmotionDetector, MultilingualHandler
+except ImportError as e:
+    TextProcessor = EmotionDetector = MultilingualHandler = None
+    _IMPORT_ERRORS["Language processing"] = e
+
+try:
+    from src.streaming import AudioStreamer
+except ImportError as e:
+    AudioStreamer = None
+    _IMPORT_ERRORS["Streaming"] = e
+
+_PACKAGES = (
+    ("Config", "src.config"),
+    ("Voice engine", "src.voice_engine"),
+    ("Character system", "src.characters"),
+    ("Language processing", "src.language"),
+    ("Streaming", "src.streaming"),
+)
+
+# Inputs for test_text_processing
+TEST_TEXTS = (
+    "Hello! 😊 How are you today?",
+    "大家好！今天天气真不错～",
+    "Let's test some emoji processing! 🎉🔥",
+)
+TEST_EMOTION_TEXT = "I'm so happy and excited! 😄🎉"
+TEST_MIXED_TEXT = "Hello 大家好 this is mixed language text"
+
+# Set by --only: lowercased name fragments selecting the tests to run
+_ONLY_TESTS = ()
+
+# Set by --full: test_imports also imports the voice engines
+_VOICE_ENGINE_MODULES = (
+    "src.voice_engine.voice_manager",
+    "src.voice_engine.xtts_engine",
+    "src.voice_engine.chattts_engine",
+    "src.voice_engine.realtime_tts",
+)
+_FULL_IMPORTS = False
+
+# With --cache, passing results are remembered per test for a day, keyed by
+# the Python version, the dependency versions, the .env and requirements
+# contents, the audio devices and the newest mtime of this script and src/,
+# so unchanged subsystems are not re-run. Off by default: the key cannot see
+# everything a test touches (models on disk, the network).
+_RESULT_CACHE_PATH = Path.home() / ".cache" / "ai-zhibo" / "test_cache.json"
+_RESULT_CACHE_TTL = 24 * 60 * 60
+_RESULT_CACHE_PACKAGES = (
+    "torch", "torchaudio", "TTS", "ChatTTS", "RealtimeTTS",
+    "numpy", "scipy", "librosa", "soundfile", "sounddevice", "pyaudio",
+    "pydantic", "pydantic-settings", "websockets",
+)
+_RESULT_CACHE_FILES = (".env", "requirements.txt")
+_USE_RESULT_CACHE = False
+
+
+def subsystem_test(name: str):
+    """Log a test's output as one block with its timing; failures propagate to run_all_tests"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Each gathered test runs in its own task, so the buffer is per test
+            records = []
+            token = _TEST_LOG.set(records)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                _TEST_LOG.reset(token)
+                lines = [record.getMessage() for record in records]
+                lines.append(f"⏱️ {name} took {elapsed:.1f} ms")
+                level = max((record.levelno for record in records), default=logging.INFO)
+                logger.log(level, "\n".join(lines))
+        return wrapper
+    return decorator
+
+
+# Managers are built, and the voice manager and audio streamer initialized,
+# once per process so repeated runs (e.g. from a watch loop) skip model
+# probing and device setup. The tests are read-only sanity checks, so they
+# can share instances.
+@lru_cache(maxsize=None)
+def _personality_manager():
+    return PersonalityManager()
+
+
+@lru_cache(maxsize=None)
+def _asmr_manager():
+    return ASMRManager()
+
+
+@lru_cache(maxsize=None)
+def _text_processor():
+    return TextProcessor()
+
+
+@lru_cache(maxsize=None)
+def _emotion_detector():
+    return EmotionDetector()
+
+
+@lru_cache(maxsize=None)
+def _multilingual_handler():
+    return MultilingualHandler()
+
+
+@lru_cache(maxsize=None)
+def _voice_manager():
+    return voice_engine.VoiceManager()
+
+
+@lru_cache(maxsize=None)
+def _voice_manager_initialized() -> bool:
+    return _voice_manager().initialize()
+
+
+@lru_cache(maxsize=None)
+def _audio_streamer():
+    return AudioStreamer()
+
 
+@lru_cache(maxsize=None)
+def _audio_streamer_initialized() -> bool:
+    return _audio_streamer().initialize()
+
+
+def _result_cache_key() -> str:
+    """Hash of everything a cached test result depends on"""
+    digest = hashlib.sha256(sys.version.encode())
+    for package in _RESULT_CACHE_PACKAGES:
+        try:
+            version = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            version = "missing"
+        digest.update(f"{package}={version}".encode())
+    
+    script = Path(__file__).resolve()
+    for name in _RESULT_CACHE_FILES:
+        try:
+            digest.update((script.parent / name).read_bytes())
+        except OSError:
+            digest.update(f"{name} missing".encode())
+    
+    # Plugging in or removing a sound card changes what the audio tests see
+    try:
+        import sounddevice
+        devices = [(device["name"], device["max_input_channels"], device["max_output_channels"])
+                   for device in sounddevice.query_devices()]
+    except Exception:
+        devices = None
+    digest.update(repr(devices).encode())
+    
+    sources = [script, *(script.parent / "src").rglob("*.py")]
+    newest = max(path.stat().st_mtime for path in sources)
+    digest.update(repr(newest).encode())
+    return digest.hexdigest()
+
+
+def _load_result_cache() -> dict:
+    try:
+        with open(_RESULT_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_result_cache(cache: dict):
+    try:
+        _RESULT_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(_RESULT_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        logger.warning("⚠️ Could not save test result cache: %s", e)
+
+
+@subsystem_test("Module Imports")
 async def test_imports():
-    """Test if all modules can be imported"""
+    """Test if all modules can be found, and with --full imported"""
     logger.info("🧪 Testing module imports...")
     
+    # Stops at the first package that is missing or failed to import
     try:
-        from src.config import settings, VoiceProfile
-        logger.info("✅ Config module imported")
+        for module_name, package in _PACKAGES:
+            if module_name in _IMPORT_ERRORS:
+                raise _IMPORT_ERRORS[module_name]
+            if importlib.util.find_spec(package) is None:
+                raise ImportError(f"No module named {package!r}")
         
-        from src.voice_engine import VoiceManager, XTTSEngine, RealtimeTTSEngine
-        logger.info("✅ Voice engine modules imported")
-        
-        from src.characters import PersonalityManager, ASMRManager, VoiceProfileManager
-        logger.info("✅ Character system modules imported")
-        
-        from src.language import TextProcessor, EmotionDetector, MultilingualHandler
-        logger.info("✅ Language processing modules imported")
-        
-        from src.streaming import AudioStreamer
-        logger.info("✅ Streaming modules imported")
-        
-        return True
+        if _FULL_IMPORTS:
+            module_name = "Voice engine"
+            for module in _VOICE_ENGINE_MODULES:
+                importlib.import_module(module)
         
     except ImportError as e:
-        logger.error(f"❌ Import failed: {e}")
+        logger.error("❌ %s import failed: %s", module_name, e)
         return False
+    
+    logger.info("✅ %d packages found%s", len(_PACKAGES), ", voice engines imported" if _FULL_IMPORTS else "")
+    return True
 
 
+@subsystem_test("Configuration")
 async def test_configuration():
     """Test configuration system"""
     logger.info("🧪 Testing configuration...")
     
-    try:
-        from src.config import settings, get_settings, VoiceProfile
-        
-        # Test settings access
-        logger.info(f"✅ App name: {settings.app_name}")
-        logger.info(f"✅ Primary engine: {settings.primary_voice_engine}")
-        logger.info(f"✅ Sample rate: {settings.sample_rate}")
-        
-        # Test voice profile creation
-        profile = VoiceProfile(
-            name="test_profile",
-            gender="female",
-            pitch=1.1,
-            speed=1.0
-        )
-        logger.info(f"✅ Voice profile created: {profile.name}")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Configuration test failed: {e}")
+    if settings is None:
+        logger.error("❌ Configuration test failed: %s", _IMPORT_ERRORS["Config"])
         return False
+    
+    # Test settings access
+    logger.info("✅ App name: %s", settings.app_name)
+    logger.info("✅ Primary engine: %s", settings.primary_voice_engine)
+    logger.info("✅ Sample rate: %s", settings.sample_rate)
+    
+    # Test voice profile creation
+    profile = VoiceProfile(
+        name="test_profile",
+        gender="female",
+        pitch=1.1,
+        speed=1.0
+    )
+    logger.info("✅ Voice profile created: %s", profile.name)
+    
+    return True
 
 
+@subsystem_test("Personality System")
 async def test_personality_system():
     """Test personality management"""
     logger.info("🧪 Testing personality system...")
     
-    try:
-        from src.characters import PersonalityManager
-        
-        manager = PersonalityManager()
-        
-        # Test personality listing
-        personalities = manager.get_available_personalities()
-        logger.info(f"✅ Found {len(personalities)} personalities: {personalities}")
-        
-        # Test personality switching
-        if personalities:
-            test_personality = personalities[0]
-            success = manager.set_personality(test_personality)
-            if success:
-                logger.info(f"✅ Switched to personality: {test_personality}")
-                
-                # Test voice profile generation
-                voice_profile = manager.get_voice_profile()
-                logger.info(f"✅ Generated voice profile: {voice_profile.name}")
-                
-                # Test response generation
-                response = manager.get_response_text("greeting")
-                logger.info(f"✅ Generated response: {response[:50]}...")
-            else:
-                logger.error(f"❌ Failed to switch personality")
-                return False
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Personality system test failed: {e}")
+    if PersonalityManager is None:
+        logger.error("❌ Personality system test failed: %s", _IMPORT_ERRORS["Character system"])
         return False
+    
+    manager = _personality_manager()
+    
+    # Test personality listing
+    personalities = manager.get_available_personalities()
+    logger.info("✅ Found %d personalities: %s", len(personalities), personalities)
+    
+    # Test personality switching
+    if personalities:
+        test_personality = personalities[0]
+        success = manager.set_personality(test_personality)
+        if success:
+            logger.info("✅ Switched to personality: %s", test_personality)
+            
+            # Test voice profile generation
+            voice_profile = manager.get_voice_profile()
+            logger.info("✅ Generated voice profile: %s", voice_profile.name)
+            
+            # Test response generation
+            response = manager.get_response_text("greeting")
+            logger.info("✅ Generated response: %s...", response[:50])
+        else:
+            logger.error("❌ Failed to switch personality")
+            return False
+    
+    return True
 
 
+@subsystem_test("ASMR System")
 async def test_asmr_system():
     """Test ASMR system"""
     logger.info("🧪 Testing ASMR system...")
     
-    try:
-        from src.characters import ASMRManager
-        
-        manager = ASMRManager()
-        
-        # Test ASMR mode listing
-        modes = manager.get_available_modes()
-        logger.info(f"✅ Found {len(modes)} ASMR modes: {modes}")
-        
-        # Test ASMR mode switching
-        if modes:
-            test_mode = modes[0]
-            success = manager.set_asmr_mode(test_mode)
-            if success:
-                logger.info(f"✅ Switched to ASMR mode: {test_mode}")
-                
-                # Test ASMR text generation
-                asmr_text = manager.generate_asmr_text("Hello, this is a test")
-                logger.info(f"✅ Generated ASMR text: {asmr_text}")
-                
-                # Test voice profile
-                voice_profile = manager.get_asmr_voice_profile()
-                logger.info(f"✅ ASMR voice profile: {voice_profile.name}")
-            else:
-                logger.error(f"❌ Failed to switch ASMR mode")
-                return False
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ ASMR system test failed: {e}")
+    if ASMRManager is None:
+        logger.error("❌ ASMR system test failed: %s", _IMPORT_ERRORS["Character system"])
         return False
+    
+    manager = _asmr_manager()
+    
+    # Test ASMR mode listing
+    modes = manager.get_available_modes()
+    logger.info("✅ Found %d ASMR modes: %s", len(modes), modes)
+    
+    # Test ASMR mode switching
+    if modes:
+        test_mode = modes[0]
+        success = manager.set_asmr_mode(test_mode)
+        if success:
+            logger.info("✅ Switched to ASMR mode: %s", test_mode)
+            
+            # Test ASMR text generation
+            asmr_text = manager.generate_asmr_text("Hello, this is a test")
+            logger.info("✅ Generated ASMR text: %s", asmr_text)
+            
+            # Test voice profile
+            voice_profile = manager.get_asmr_voice_profile()
+            logger.info("✅ ASMR voice profile: %s", voice_profile.name)
+        else:
+            logger.error("❌ Failed to switch ASMR mode")
+            return False
+    
+    return True
 
 
+@subsystem_test("Text Processing")
 async def test_text_processing():
     """Test text processing"""
     logger.info("🧪 Testing text processing...")
     
-    try:
-        from src.language import TextProcessor, EmotionDetector, MultilingualHandler
-        
-        # Test text processor
-        processor = TextProcessor()
-        
-        test_texts = [
-            "Hello! 😊 How are you today?",
-            "大家好！今天天气真不错～",
-            "Let's test some emoji processing! 🎉🔥"
-        ]
-        
-        for text in test_texts:
-            processed = processor.process_text(text)
-            emotions = processor.extract_emotions(text)
-            logger.info(f"✅ Processed: '{text}' -> '{processed}' (emotions: {emotions})")
-        
-        # Test emotion detector
-        emotion_detector = EmotionDetector()
-        
-        test_emotion_text = "I'm so happy and excited! 😄🎉"
-        emotions = emotion_detector.detect_emotions(test_emotion_text)
-        logger.info(f"✅ Detected emotions: {emotions}")
-        
-        # Test multilingual handler
-        multilingual = MultilingualHandler()
-        
-        mixed_text = "Hello 大家好 this is mixed language text"
-        language, confidence = multilingual.detect_language(mixed_text)
-        logger.info(f"✅ Language detection: {language} (confidence: {confidence:.2f})")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Text processing test failed: {e}")
+    if TextProcessor is None:
+        logger.error("❌ Text processing test failed: %s", _IMPORT_ERRORS["Language processing"])
         return False
+    
+    # Test text processor
+    processor = _text_processor()
+    
+    processed_texts = processor.process_batch(TEST_TEXTS)
+    text_emotions = processor.extract_emotions_batch(TEST_TEXTS)
+    for text, processed, emotions in zip(TEST_TEXTS, processed_texts, text_emotions):
+        logger.info("✅ Processed: '%s' -> '%s' (emotions: %s)", text, processed, emotions)
+    
+    # Test emotion detector
+    emotion_detector = _emotion_detector()
+    
+    emotions = emotion_detector.detect_emotions(TEST_EMOTION_TEXT)
+    logger.info("✅ Detected emotions: %s", emotions)
+    
+    # Test multilingual handler
+    multilingual = _multilingual_handler()
+    
+    language, confidence = multilingual.detect_language(TEST_MIXED_TEXT)
+    logger.info("✅ Language detection: %s (confidence: %.2f)", language, confidence)
+    
+    return True
 
 
+@subsystem_test("Voice Manager")
 async def test_voice_manager():
     """Test voice manager (without actual synthesis)"""
     logger.info("🧪 Testing voice manager...")
     
-    try:
-        from src.voice_engine import VoiceManager
-        
-        manager = VoiceManager()
-        
-        # Test initialization (may fail if models not available)
-        logger.info("Attempting voice manager initialization...")
-        success = manager.initialize()
+    if voice_engine is None:
+        logger.error("❌ Voice manager test failed: %s", _IMPORT_ERRORS["Voice engine"])
+        return False
+    
+    # Test initialization (may fail if models not available); model
+    # loading blocks, so it runs off the event loop
+    logger.info("Attempting voice manager initialization...")
+    loop = asyncio.get_running_loop()
+    success = await loop.run_in_executor(None, _voice_manager_initialized)
+    manager = _voice_manager()
+    
+    if success:
+        logger.info("✅ Voice manager initialized successfully")
         
-        if success:
-            logger.info("✅ Voice manager initialized successfully")
-            
-            # Test engine listing
-            engines = manager.get_available_engines()
-            logger.info(f"✅ Available engines: {engines}")
-            
-            # Test profile listing
-            profiles = manager.get_available_profiles()
-            logger.info(f"✅ Available profiles: {profiles}")
-            
-        else:
-            logger.warning("⚠️ Voice manager initialization failed (models may not be available)")
-            logger.info("This is expected if TTS models are not installed")
+        # Test engine listing
+        engines = manager.get_available_engines()
+        logger.info("✅ Available engines: %s", engines)
         
-        return True
+        # Test profile listing
+        profiles = manager.get_available_profiles()
+        logger.info("✅ Available profiles: %s", profiles)
         
-    except Exception as e:
-        logger.error(f"❌ Voice manager test failed: {e}")
-        return False
+    else:
+        logger.warning("⚠️ Voice manager initialization failed (models may not be available)")
+        logger.info("This is expected if TTS models are not installed")
+    
+    return True
 
 
+@subsystem_test("Audio Streamer")
 async def test_audio_streamer():
     """Test audio streamer (without actual audio)"""
     logger.info("🧪 Testing audio streamer...")
     
-    try:
-        from src.streaming import AudioStreamer
-        
-        streamer = AudioStreamer()
-        
-        # Test initialization
-        success = streamer.initialize()
-        
-        if success:
-            logger.info("✅ Audio streamer initialized")
-            
-            # Test stats
-            stats = streamer.get_stream_stats()
-            logger.info(f"✅ Stream stats: {stats}")
-            
-        else:
-            logger.warning("⚠️ Audio streamer initialization failed (audio system may not be available)")
-            logger.info("This is expected if audio drivers are not properly configured")
+    if AudioStreamer is None:
+        logger.error("❌ Audio streamer test failed: %s", _IMPORT_ERRORS["Streaming"])
+        return False
+    
+    # Test initialization; opening the audio system blocks, so it runs
+    # off the event loop
+    loop = asyncio.get_running_loop()
+    success = await loop.run_in_executor(None, _audio_streamer_initialized)
+    streamer = _audio_streamer()
+    
+    if success:
+        logger.info("✅ Audio streamer initialized")
         
-        return True
+        # Test stats
+        stats = streamer.get_stream_stats()
+        logger.info("✅ Stream stats: %s", stats)
         
-    except Exception as e:
-        logger.error(f"❌ Audio streamer test failed: {e}")
-        return False
+    else:
+        logger.warning("⚠️ Audio streamer initialization failed (audio system may not be available)")
+        logger.info("This is expected if audio drivers are not properly configured")
+    
+    return True
 
 
 async def run_all_tests():
     """Run all system tests"""
     logger.info("🚀 Starting AI Voice Streaming Host system tests...")
     
-    tests = [
-        ("Module Imports", test_imports),
-        ("Configuration", test_configuration),
-        ("Personality System", test_personality_system),
-        ("ASMR System", test_asmr_system),
-        ("Text Processing", test_text_processing),
-        ("Voice Manager", test_voice_manager),
-        ("Audio Streamer", test_audio_streamer),
-    ]
+    tests = _TESTS
+    if _ONLY_TESTS:
+        tests = tuple(
+            (test_name, test_func) for test_name, test_func in _TESTS
+            if any(only in test_name.lower() for only in _ONLY_TESTS)
+        )
     
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        logger.info(f"\n📋 Running test: {test_name}")
-        try:
-            success = await test_func()
-            if success:
-                passed += 1
-                logger.info(f"✅ {test_name} PASSED")
-            else:
-                logger.error(f"❌ {test_name} FAILED")
-        except Exception as e:
-            logger.error(f"❌ {test_name} FAILED with exception: {e}")
+    # Skip tests that passed recently against the same code and dependencies
+    now = time.time()
+    cache = _load_result_cache() if _USE_RESULT_CACHE else {}
+    cache_key = _result_cache_key() if _USE_RESULT_CACHE else None
+    cached = {
+        test_name for test_name, _ in tests
+        if test_name in cache and cache[test_name]["key"] == cache_key
+        and now - cache[test_name]["time"] < _RESULT_CACHE_TTL
+    }
+    pending = [(test_name, test_func) for test_name, test_func in tests if test_name not in cached]
+    
+    logger.info("\n📋 Running %d tests: %s", len(pending), ", ".join(name for name, _ in pending))
+    results = {}
     
-    logger.info(f"\n📊 Test Results: {passed}/{total} tests passed")
+    # Every other test needs the imports, so they run first and a failure
+    # skips the rest (cached passes included) instead of running each into
+    # the same ImportError
+    if pending and pending[0][1] is test_imports:
+        test_name, _ = pending.pop(0)
+        results[test_name] = (await asyncio.gather(test_imports(), return_exceptions=True))[0]
+        if results[test_name] is not True:
+            logger.error("❌ Imports failed, skipping the remaining tests")
+            pending = []
+            cached = set()
+    
+    # The subsystems are independent, so their awaits can overlap
+    gathered = await asyncio.gather(*(test_func() for _, test_func in pending), return_exceptions=True)
+    results.update(zip((name for name, _ in pending), gathered))
+    
+    for test_name, _ in tests:
+        if test_name in cached:
+            passed += 1
+            logger.info("✅ %s PASSED (cached)", test_name)
+            continue
+        if test_name not in results:
+            logger.warning("⏭️ %s SKIPPED", test_name)
+            continue
+        
+        result = results[test_name]
+        cache.pop(test_name, None)
+        if isinstance(result, BaseException):
+            logger.error("❌ %s FAILED with exception: %s", test_name, result)
+        elif result:
+            passed += 1
+            cache[test_name] = {"key": cache_key, "time": now}
+            logger.info("✅ %s PASSED", test_name)
+        else:
+            logger.error("❌ %s FAILED", test_name)
+    
+    if _USE_RESULT_CACHE:
+        _save_result_cache(cache)
+    
+    logger.info("\n📊 Test Results: %d/%d tests passed", passed, total)
     
     if passed == total:
         logger.info("🎉 All tests passed! System is ready to use.")
@@ -298,6 +548,17 @@ async def run_all_tests():
     return passed == total
 
 
+_TESTS = (
+    ("Module Imports", test_imports),
+    ("Configuration", test_configuration),
+    ("Personality System", test_personality_system),
+    ("ASMR System", test_asmr_system),
+    ("Text Processing", test_text_processing),
+    ("Voice Manager", test_voice_manager),
+    ("Audio Streamer", test_audio_streamer),
+)
+
+
 async def main():
     """Main test function"""
     try:
@@ -315,9 +576,24 @@ async def main():
         logger.info("🛑 Tests interrupted by user")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"❌ Test runner failed: {e}")
+        logger.error("❌ Test runner failed: %s", e)
         sys.exit(1)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Voice Streaming Host system tests")
+    parser.add_argument("--full", action="store_true",
+                        help="Also import the voice engines (torch, TTS backends) in the import test")
+    parser.add_argument("--cache", action="store_true",
+                        help="Skip tests that passed recently with unchanged code, dependencies and config")
+    parser.add_argument("--only", metavar="NAME[,NAME]",
+                        help="Run only tests whose name contains one of these (e.g. voice,audio)")
+    args = parser.parse_args()
+    _ONLY_TESTS = tuple(name.strip().lower() for name in (args.only or "").split(",") if name.strip())
+    _FULL_IMPORTS = args.full
+    _USE_RESULT_CACHE = args.cache
+    
+    if uvloop is not None and sys.platform != "win32":
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     asyncio.run(main())